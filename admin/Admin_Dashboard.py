@@ -97,3 +97,10 @@ st.write("Preview team standings and player leaderboards")
 if st.button("View Rankings", key="nav_rankings", use_container_width=True):
     st.switch_page("pages/5_Rankings.py")
 
+st.divider()
+
+# Play-by-play section
+st.markdown("### Play-by-Play")
+st.write("Page through a game's scoring and correct several entries at once")
+if st.button("Open Play-by-Play", key="nav_play_by_play", use_container_width=True):
+    st.switch_page("pages/6_Play_by_Play.py")
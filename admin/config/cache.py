@@ -0,0 +1,295 @@
+"""
+Stale-while-revalidate caching and a circuit breaker for Supabase reads.
+
+@stale_while_revalidate(ttl) replaces @st.cache_data(ttl) on the pages'
+fetch helpers. An entry younger than ttl is served as is. An older one is
+still served straight away, and refreshed on a background thread, so a
+slow or unavailable Supabase never blocks a page that has seen the data
+before. Only a first fetch waits on the network.
+
+Every read goes through one process-wide CircuitBreaker. After
+FAILURE_THRESHOLD failures in a row it opens and calls fail immediately
+with CircuitOpenError for RESET_SECONDS, instead of each waiting for a
+timeout. Then a single trial call is let through; its success closes
+the breaker again. Only outages count as failures (see is_outage());
+a request Supabase rejects, such as a constraint violation, is raised
+as usual and leaves the breaker alone.
+
+Data that could not be refreshed is listed by show_data_status() in the
+sidebar with its age, so the admin knows what they are looking at.
+"""
+import copy
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import httpx
+import streamlit as st
+from postgrest.exceptions import APIError
+
+FAILURE_THRESHOLD = 3
+RESET_SECONDS = 30
+
+# Entries kept across all fetch helpers; old generations age out first
+MAX_ENTRIES = 512
+
+
+# PostgREST codes for a database it can't reach, and the SQLSTATE
+# classes for connection failures, exhausted resources, cancelled or
+# timed-out statements, and server faults
+OUTAGE_CODES = ("PGRST000", "PGRST001", "PGRST002")
+OUTAGE_SQLSTATE_CLASSES = ("08", "53", "57", "58", "XX")
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+def is_outage(error):
+    """Whether an error means Supabase is unreachable or failing, rather than refusing one request."""
+    if isinstance(error, (httpx.TransportError, ConnectionError, TimeoutError)):
+        return True
+    if isinstance(error, APIError):
+        code = error.code
+        # Responses without a JSON body carry their HTTP status
+        if isinstance(code, int) or (isinstance(code, str) and code.isdigit() and len(code) == 3):
+            return int(code) >= 500
+        if isinstance(code, str):
+            return code in OUTAGE_CODES or (len(code) == 5 and code[:2] in OUTAGE_SQLSTATE_CLASSES)
+    return False
+
+
+class CircuitBreaker:
+    """Closed, open for reset_seconds after repeated failures, then half-open for one trial call."""
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_seconds=RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "open" if self._retry_in() > 0 else "half-open"
+
+    def _retry_in(self):
+        return max(0.0, self._opened_at + self.reset_seconds - time.monotonic())
+
+    def retry_in(self):
+        """Seconds until the next trial call, 0 if calls are let through."""
+        with self._lock:
+            return 0 if self._opened_at is None else self._retry_in()
+
+    def _before_call(self):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if self._retry_in() > 0 or self._trial_running:
+                raise CircuitOpenError(f"Supabase is unavailable; retrying in {self._retry_in():.0f}s.")
+            self._trial_running = True
+
+    def call(self, func, *args, **kwargs):
+        self._before_call()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            with self._lock:
+                if is_outage(e):
+                    self._failures += 1
+                    if self._trial_running or self._failures >= self.failure_threshold:
+                        self._opened_at = time.monotonic()
+                self._trial_running = False
+            raise
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+        return result
+
+
+@st.cache_resource
+def get_circuit_breaker() -> CircuitBreaker:
+    return CircuitBreaker()
+
+
+class _Entry:
+    __slots__ = ("value", "fetched_at", "refreshing", "error")
+
+    def __init__(self, value):
+        self.value = value
+        self.fetched_at = time.time()
+        self.refreshing = False
+        self.error = None
+
+
+@st.cache_resource
+def _entries():
+    return {"lock": threading.Lock(), "entries": OrderedDict()}
+
+
+def _mark(label, fetched_at=None, error=None):
+    """Record for show_data_status() whether label is being served stale."""
+    stale = st.session_state.setdefault("stale_data", {})
+    if error is None:
+        stale.pop(label, None)
+    else:
+        stale[label] = (fetched_at, error)
+
+
+def _refresh(key, entry, func, args, kwargs):
+    try:
+        value = get_circuit_breaker().call(func, *args, **kwargs)
+    except Exception as e:
+        entry.error = str(e)
+    else:
+        fresh = _Entry(value)
+        store = _entries()
+        with store["lock"]:
+            # Not if the helper was cleared while this was running
+            if store["entries"].get(key) is entry:
+                store["entries"][key] = fresh
+    finally:
+        entry.refreshing = False
+
+
+def _previous_generation(entries, key):
+    """
+    The newest entry for the same helper and arguments under an earlier
+    division generation (see config/divisions.py), or None.
+    """
+    name, arguments = key
+    wanted = tuple(item for item in arguments if item[0] != "generation")
+    matches = [
+        entry for (entry_name, entry_arguments), entry in entries.items()
+        if entry_name == name and tuple(item for item in entry_arguments if item[0] != "generation") == wanted
+    ]
+    return max(matches, key=lambda entry: entry.fetched_at, default=None)
+
+
+def stale_while_revalidate(ttl):
+    """
+    Cache a fetch helper for every session, serving stale entries while
+    they are refreshed in the background.
+
+    Like st.cache_data, arguments whose names start with an underscore are
+    left out of the cache key, and the wrapper has a clear() method.
+    Values are returned as copies, so callers may change them.
+
+    A write or Refresh moves the division on to a new generation, so the
+    next fetch is a miss. If that fetch fails, the same fetch from the
+    last generation is served stale instead; only a helper that has never
+    been fetched raises.
+    """
+    def decorate(func):
+        # Every page script runs as __main__, so the file tells helpers apart
+        name = f"{func.__code__.co_filename}:{func.__qualname__}"
+        label = func.__name__.removeprefix("fetch_").replace("_", " ").capitalize()
+        signature = inspect.signature(func)
+
+        def cache_key(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return (name, tuple((arg, value) for arg, value in bound.arguments.items() if not arg.startswith("_")))
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = cache_key(args, kwargs)
+            store = _entries()
+            with store["lock"]:
+                entry = store["entries"].get(key)
+                if entry is not None:
+                    store["entries"].move_to_end(key)
+
+            if entry is None:
+                # Not fetched for this generation yet, so this one waits
+                try:
+                    value = get_circuit_breaker().call(func, *args, **kwargs)
+                except Exception as e:
+                    with store["lock"]:
+                        previous = _previous_generation(store["entries"], key)
+                        if previous is None:
+                            raise
+                        # Refreshed in the background once it expires
+                        entry = _Entry(previous.value)
+                        entry.fetched_at = previous.fetched_at
+                        entry.error = str(e)
+                        store["entries"][key] = entry
+                    _mark(label, entry.fetched_at, entry.error)
+                    return copy.deepcopy(entry.value)
+                with store["lock"]:
+                    store["entries"][key] = _Entry(value)
+                    while len(store["entries"]) > MAX_ENTRIES:
+                        store["entries"].popitem(last=False)
+                _mark(label)
+                return copy.deepcopy(value)
+
+            if time.time() - entry.fetched_at >= ttl:
+                with store["lock"]:
+                    start = not entry.refreshing
+                    entry.refreshing = True
+                if start:
+                    threading.Thread(target=_refresh, args=(key, entry, func, args, kwargs), daemon=True).start()
+            _mark(label, entry.fetched_at, entry.error)
+            return copy.deepcopy(entry.value)
+
+        def clear():
+            store = _entries()
+            with store["lock"]:
+                for key in [key for key in store["entries"] if key[0] == name]:
+                    del store["entries"][key]
+
+        wrapper.clear = clear
+        return wrapper
+
+    return decorate
+
+
+def sync_ledger(ledger):
+    """
+    Sync a LedgerReplica through the circuit breaker.
+
+    On failure the replica keeps serving the rows from its last sync, which
+    is noted for show_data_status(). Returns the error message, or None.
+    """
+    try:
+        get_circuit_breaker().call(ledger.sync)
+    except Exception as e:
+        _mark("Scores", ledger.synced_at, str(e))
+        return str(e)
+    _mark("Scores")
+    return None
+
+
+def _age(fetched_at):
+    if fetched_at is None:
+        return "not yet loaded"
+    minutes = int(time.time() - fetched_at) // 60
+    as_of = datetime.fromtimestamp(fetched_at).strftime("%I:%M %p")
+    return f"as of {as_of}" + (f" ({minutes} min ago)" if minutes else "")
+
+
+def stale_notice(label, fetched_at):
+    return f"{label} {_age(fetched_at)}: Supabase could not be reached."
+
+
+def show_data_status():
+    """Sidebar warning listing data that is being served stale, and the breaker state."""
+    # Collected afresh on every run
+    stale = st.session_state.pop("stale_data", {})
+    breaker = get_circuit_breaker()
+    if not stale and breaker.state == "closed":
+        return
+
+    message = "**Showing last known data**\n\n"
+    message += "\n".join(f"- {label} {_age(fetched_at)}" for label, (fetched_at, _) in sorted(stale.items()))
+    if breaker.state != "closed":
+        message += f"\n\nSupabase requests paused; retrying in {breaker.retry_in():.0f}s."
+    st.sidebar.warning(message)
@@ -0,0 +1,58 @@
+"""
+League divisions.
+
+Every page works on one division at a time, picked in the sidebar. Cached
+fetches take the division and its generation as arguments, so each
+division has its own cache entries. A write calls invalidate_division(),
+which moves only that division on to fresh entries on every page instead
+of clearing every cache in the app.
+"""
+import threading
+import streamlit as st
+
+from config.cache import stale_while_revalidate
+
+DEFAULT_DIVISION = "Open"
+
+
+@stale_while_revalidate(ttl=300)
+def fetch_divisions(_supabase):
+    response = _supabase.table("divisions").select("name").order("name").execute()
+    return [division['name'] for division in response.data]
+
+
+def select_division(supabase):
+    """Sidebar division picker. The choice follows the admin from page to page."""
+    try:
+        divisions = fetch_divisions(supabase) or [DEFAULT_DIVISION]
+    except Exception as e:
+        # Never loaded; stay on the admin's division until Supabase answers
+        st.sidebar.error(f"Couldn't load divisions: {e}")
+        divisions = [st.session_state.get("division", DEFAULT_DIVISION)]
+    current = st.session_state.get("division")
+    index = divisions.index(current) if current in divisions else 0
+    division = st.sidebar.selectbox("Division", options=divisions, index=index)
+    st.session_state["division"] = division
+    return division
+
+
+@st.cache_resource
+def _division_generations():
+    return {"lock": threading.Lock(), "generations": {}}
+
+
+def division_generation(division):
+    return _division_generations()["generations"].get(division, 0)
+
+
+def league_generation():
+    """Changes whenever any division is written to, for fetches across divisions."""
+    # Generations only go up, so their sum never repeats
+    return sum(_division_generations()["generations"].values())
+
+
+def invalidate_division(division):
+    """Expire the division's cached fetches on every page and session."""
+    state = _division_generations()
+    with state["lock"]:
+        state["generations"][division] = state["generations"].get(division, 0) + 1
@@ -0,0 +1,41 @@
+import hashlib
+import os
+import re
+import streamlit as st
+
+from config.supabase import get_supabase_client
+from league.replica import LedgerReplica
+from league.standings import MatchupMatrix
+
+DEFAULT_REPLICA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".ledger_replicas")
+
+
+def replica_path(directory, division):
+    """SQLite file for a division's replica; the hash keeps similar names apart."""
+    slug = re.sub(r"[^a-z0-9]+", "_", division.lower()).strip("_")
+    digest = hashlib.sha1(division.encode()).hexdigest()[:8]
+    return os.path.join(directory, f"{slug}-{digest}.sqlite3")
+
+
+@st.cache_resource
+def get_ledger_replica(division) -> LedgerReplica:
+    """
+    Return the division's ledger replica, shared by every page and session.
+
+    Replica files live in admin/.ledger_replicas/ unless LEDGER_REPLICA_DIR
+    is set.
+    """
+    directory = os.getenv("LEDGER_REPLICA_DIR", DEFAULT_REPLICA_DIR)
+    os.makedirs(directory, exist_ok=True)
+    return LedgerReplica(get_supabase_client(), replica_path(directory, division), division)
+
+
+@st.cache_resource
+def get_matchup_matrix(division) -> MatchupMatrix:
+    """
+    Return the division's head-to-head matrix, shared by every page and session.
+
+    The Live Scorer adds a game when it is ended; Rankings syncs it
+    against the division's final games on each run.
+    """
+    return MatchupMatrix()
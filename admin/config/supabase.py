@@ -1,6 +1,10 @@
 import os
 import streamlit as st
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
+
+# Fail a request after this long instead of the client's default two
+# minutes; config.cache serves the last known data meanwhile
+REQUEST_TIMEOUT_SECONDS = 10
 
 def get_supabase_client() -> Client:
     """
@@ -13,7 +17,7 @@ def get_supabase_client() -> Client:
     try:
         url = st.secrets["SUPABASE_URL"]
         key = st.secrets["SUPABASE_KEY"]
-        return create_client(url, key)
+        return create_client(url, key, options=ClientOptions(postgrest_client_timeout=REQUEST_TIMEOUT_SECONDS))
     except (KeyError, FileNotFoundError):
         pass
 
@@ -29,4 +33,4 @@ def get_supabase_client() -> Client:
             "Missing Supabase credentials. "
             "Add them to Streamlit secrets (deployed) or .env file (local)."
         )
-    return create_client(url, key)
+    return create_client(url, key, options=ClientOptions(postgrest_client_timeout=REQUEST_TIMEOUT_SECONDS))
@@ -0,0 +1,201 @@
+"""
+Compact columnar copy of the ledger.
+
+A list of PostgREST-shaped dicts costs several hundred bytes per basket:
+a dict, its own copies of the player and team name strings, and an ISO
+timestamp string. ColumnarLedger keeps one NumPy array per column instead:
+
+    id, game_id   int64
+    points        int8
+    team, player  int32 codes into team_names / player_names
+    created_at    float64 epoch seconds
+
+about 33 bytes per row, and aggregations become array operations
+(np.bincount over codes) instead of Python loops over dicts.
+
+Rows are kept sorted by id so the replica's overlapping re-reads and
+deletions are found by binary search.
+"""
+from datetime import datetime
+
+import numpy as np
+
+COLUMN_TYPES = {
+    "id": np.int64,
+    "game_id": np.int64,
+    "team": np.int32,
+    "player": np.int32,
+    "points": np.int8,
+    "created_at": np.float64,
+}
+
+
+def _epoch(timestamp):
+    if not timestamp:
+        return np.nan
+    return datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp()
+
+
+def group_codes(*columns):
+    """
+    Group rows by the combination of several integer columns.
+
+    Returns (first, inverse): first[g] is the index of a row in group g
+    (so column[first] gives each group's value), inverse[i] is row i's
+    group.
+    """
+    key = np.zeros(len(columns[0]), dtype=np.int64)
+    for column in columns:
+        column = np.asarray(column, dtype=np.int64)
+        low = column.min()
+        key = key * (int(column.max() - low) + 1) + (column - low)
+    _, first, inverse = np.unique(key, return_index=True, return_inverse=True)
+    return first, inverse.reshape(-1)
+
+
+class ColumnarLedger:
+    """
+    Ledger rows as NumPy columns with dictionary-encoded names.
+
+    extend() and delete() keep a live copy in step with the replica; call
+    snapshot() for a copy that later changes will not touch.
+    """
+
+    def __init__(self, rows=()):
+        self.team_names = []
+        self.player_names = []
+        self._team_codes = {}
+        self._player_codes = {}
+        self._buffers = {name: np.empty(0, dtype) for name, dtype in COLUMN_TYPES.items()}
+        self._size = 0
+        self._set_views()
+        self.extend(rows)
+
+    def __len__(self):
+        return self._size
+
+    def _set_views(self):
+        for name, buffer in self._buffers.items():
+            setattr(self, name, buffer[:self._size])
+
+    def _code(self, value, names, codes):
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(names)
+            names.append(value)
+        return code
+
+    def _reserve(self, size):
+        capacity = len(self._buffers["id"])
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity, 1024)
+        for name, buffer in self._buffers.items():
+            grown = np.empty(capacity, buffer.dtype)
+            grown[:self._size] = buffer[:self._size]
+            self._buffers[name] = grown
+
+    # ------------------------------------------
+    # Changes
+    # ------------------------------------------
+    def extend(self, rows):
+        """
+        Add ledger rows given as (id, game_id, player_name, team_name,
+        points, created_at) tuples. Rows already present are skipped.
+        Returns the number of rows added.
+        """
+        rows = list(rows)
+        if self._size:
+            # Rows at or below the highest id are the replica's overlapping
+            # re-reads, or inserts that committed out of order
+            last_id = self.id[-1]
+            known = self.id
+            rows = [
+                row for row in rows
+                if row[0] > last_id or known[min(np.searchsorted(known, row[0]), self._size - 1)] != row[0]
+            ]
+        if not rows:
+            return 0
+
+        rows.sort(key=lambda row: row[0])
+        new = {
+            "id": np.fromiter((row[0] for row in rows), np.int64, len(rows)),
+            "game_id": np.fromiter((row[1] for row in rows), np.int64, len(rows)),
+            "player": np.fromiter(
+                (self._code(row[2], self.player_names, self._player_codes) for row in rows), np.int32, len(rows)
+            ),
+            "team": np.fromiter(
+                (self._code(row[3], self.team_names, self._team_codes) for row in rows), np.int32, len(rows)
+            ),
+            "points": np.fromiter((row[4] for row in rows), np.int8, len(rows)),
+            "created_at": np.fromiter((_epoch(row[5]) for row in rows), np.float64, len(rows)),
+        }
+
+        in_order = not self._size or new["id"][0] > self.id[-1]
+        self._reserve(self._size + len(rows))
+        end = self._size + len(rows)
+        for name, values in new.items():
+            self._buffers[name][self._size:end] = values
+        self._size = end
+
+        if not in_order:
+            # Re-sorted into new buffers, so earlier snapshots keep their order
+            order = np.argsort(self._buffers["id"][:end], kind="stable")
+            self._buffers = {name: buffer[:end][order] for name, buffer in self._buffers.items()}
+        self._set_views()
+        return len(rows)
+
+    def delete(self, ids):
+        """Remove rows by ledger id. Returns the number removed."""
+        ids = np.unique(np.fromiter(ids, np.int64))
+        positions = np.searchsorted(self.id, ids)
+        inside = positions < self._size
+        positions = positions[inside][self.id[positions[inside]] == ids[inside]]
+        if not len(positions):
+            return 0
+
+        keep = np.ones(self._size, dtype=bool)
+        keep[positions] = False
+        # New buffers, so earlier snapshots keep their rows
+        self._buffers = {name: buffer[:self._size][keep] for name, buffer in self._buffers.items()}
+        self._size = int(keep.sum())
+        self._set_views()
+        return len(positions)
+
+    def snapshot(self):
+        """A read-only copy that shares memory with this ledger."""
+        copy = ColumnarLedger.__new__(ColumnarLedger)
+        copy.team_names = list(self.team_names)
+        copy.player_names = list(self.player_names)
+        copy._team_codes = self._team_codes
+        copy._player_codes = self._player_codes
+        copy._size = self._size
+        copy._buffers = {name: buffer[:self._size] for name, buffer in self._buffers.items()}
+        copy._set_views()
+        for name in COLUMN_TYPES:
+            getattr(copy, name).flags.writeable = False
+        return copy
+
+    def nbytes(self):
+        """Bytes held by the columns (excluding spare capacity) and name dictionaries."""
+        columns = sum(getattr(self, name).nbytes for name in COLUMN_TYPES)
+        names = sum(len(name) + 49 for name in self.team_names + self.player_names)
+        return columns + names
+
+    # ------------------------------------------
+    # Aggregations
+    # ------------------------------------------
+    def game_totals(self):
+        """{(game_id, team_name): points} for every game in the ledger."""
+        if not self._size:
+            return {}
+        first, inverse = group_codes(self.game_id, self.team)
+        totals = np.bincount(inverse, weights=self.points, minlength=len(first))
+        return {
+            (int(game_id), self.team_names[team]): int(total)
+            for game_id, team, total in zip(self.game_id[first], self.team[first], totals)
+        }
+
+    def game_rows(self, game_id):
+        """Boolean mask of one game's rows."""
+        return self.game_id == game_id
@@ -0,0 +1,255 @@
+"""
+Streaming exports of the ledger, box scores and standings.
+
+Games are selected by start_time over any date range (a season is just
+its date range), paged by id, and their ledger rows are read
+GAME_BATCH games at a time. Rows are yielded as they arrive and written
+to CSV or JSON Lines one at a time, optionally gzipped, so memory stays
+flat however many seasons are exported.
+
+    ledger       one row per score_logs entry
+    box_scores   one row per player per final game
+    standings    one row per team, from the final games in the range
+                 (0-0 for teams with none)
+
+Run from the admin/ directory, e.g.:
+
+    python -m league.export ledger --from 2025-09-01 --to 2026-06-30 -o ledger.csv.gz
+    python -m league.export standings --division Open --format jsonl
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import sys
+from datetime import date, timedelta
+from itertools import islice
+
+from league.columnar import ColumnarLedger
+from league.leaderboard import box_score
+from league.replica import LEDGER_COLUMNS, PAGE_SIZE
+from league.standings import MatchupMatrix, game_results, rank_teams
+
+# Games per score_logs request; keeps the id list well inside URL limits
+GAME_BATCH = 100
+
+FORMATS = ("csv", "jsonl")
+
+
+# ------------------------------------------
+# Reading
+# ------------------------------------------
+def date_range_bounds(start=None, end=None):
+    """ISO bounds for start_time >= start and < the day after end (both dates, inclusive)."""
+    return (
+        start.isoformat() if start else None,
+        (end + timedelta(days=1)).isoformat() if end else None,
+    )
+
+
+def iter_games(supabase, division=None, start=None, end=None, status=None):
+    """Yield games whose start_time falls in [start, end), paged by id."""
+    after_id = 0
+    while True:
+        query = supabase.table("games").select("*").gt("id", after_id)
+        if division:
+            query = query.eq("division_name", division)
+        if start:
+            query = query.gte("start_time", start)
+        if end:
+            query = query.lt("start_time", end)
+        if status:
+            query = query.eq("status", status)
+        page = query.order("id").limit(PAGE_SIZE).execute().data
+        yield from page
+        if len(page) < PAGE_SIZE:
+            return
+        after_id = page[-1]['id']
+
+
+def _batches(items, size):
+    items = iter(items)
+    while batch := list(islice(items, size)):
+        yield batch
+
+
+def _ledger_pages(supabase, game_ids):
+    after_id = 0
+    while True:
+        page = (
+            supabase.table("score_logs")
+            .select(",".join(LEDGER_COLUMNS))
+            .in_("game_id", game_ids)
+            .gt("id", after_id)
+            .order("id")
+            .limit(PAGE_SIZE)
+            .execute()
+            .data
+        )
+        if page:
+            yield page
+        if len(page) < PAGE_SIZE:
+            return
+        after_id = page[-1]['id']
+
+
+def _game_ledgers(supabase, games):
+    """Yield (games, ColumnarLedger) for each batch of games, holding one batch at a time."""
+    for batch in _batches(games, GAME_BATCH):
+        ledger = ColumnarLedger()
+        for page in _ledger_pages(supabase, [game['id'] for game in batch]):
+            ledger.extend(tuple(row[column] for column in LEDGER_COLUMNS) for row in page)
+        yield batch, ledger
+
+
+# ------------------------------------------
+# Datasets
+# Each is (columns, function(supabase, division, start, end) -> rows)
+# ------------------------------------------
+def ledger_rows(supabase, division=None, start=None, end=None):
+    for batch in _batches(iter_games(supabase, division, start, end), GAME_BATCH):
+        for page in _ledger_pages(supabase, [game['id'] for game in batch]):
+            yield from page
+
+
+def box_score_rows(supabase, division=None, start=None, end=None):
+    games = iter_games(supabase, division, start, end, status="final")
+    for batch, ledger in _game_ledgers(supabase, games):
+        for game in batch:
+            for line in box_score(ledger, game['id']):
+                yield {
+                    'game_id': game['id'],
+                    'start_time': game['start_time'],
+                    'team_name': line['Team'],
+                    'player_name': line['Player'],
+                    'points': line['PTS'],
+                    'free_throws': line['FTM'],
+                    'two_pointers': line['2PM'],
+                    'three_pointers': line['3PM'],
+                }
+
+
+def standings_rows(supabase, division=None, start=None, end=None):
+    # Records come from the games in the range, not the season-long
+    # teams.wins/losses
+    matrix = MatchupMatrix()
+    games = iter_games(supabase, division, start, end, status="final")
+    for batch, ledger in _game_ledgers(supabase, games):
+        for game_id, result in game_results(batch, ledger.game_totals()).items():
+            matrix.add_game(game_id, *result)
+
+    # Every team in the division, so those without a final game in the
+    # range are listed at 0-0
+    query = supabase.table("teams").select("name")
+    if division:
+        query = query.eq("division_name", division)
+    names = {team['name'] for team in query.execute().data}.union(matrix.teams())
+
+    teams = []
+    for name in sorted(names):
+        wins, losses = matrix.record(name)
+        teams.append({'name': name, 'wins': wins, 'losses': losses})
+    for rank, row in enumerate(rank_teams(teams, matrix), 1):
+        yield {
+            'rank': rank,
+            'team_name': row['Team'],
+            'wins': row['W'],
+            'losses': row['L'],
+            'points_for': row['PF'],
+            'points_against': row['PA'],
+        }
+
+
+DATASETS = {
+    "ledger": (LEDGER_COLUMNS, ledger_rows),
+    "box_scores": (
+        ("game_id", "start_time", "team_name", "player_name", "points",
+         "free_throws", "two_pointers", "three_pointers"),
+        box_score_rows,
+    ),
+    "standings": (
+        ("rank", "team_name", "wins", "losses", "points_for", "points_against"),
+        standings_rows,
+    ),
+}
+
+
+# ------------------------------------------
+# Writing
+# ------------------------------------------
+def write_rows(rows, columns, out, fmt="csv"):
+    """Write rows to a text stream one at a time. Returns the number written."""
+    count = 0
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    elif fmt == "jsonl":
+        for row in rows:
+            out.write(json.dumps({column: row.get(column) for column in columns}))
+            out.write("\n")
+            count += 1
+    else:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    return count
+
+
+def export(supabase, dataset, binary_out, fmt="csv", compress=False, division=None, start=None, end=None):
+    """
+    Stream one dataset into a binary file object, gzipped if compress is
+    set. Returns the number of rows written.
+    """
+    columns, rows = DATASETS[dataset]
+    sink = gzip.GzipFile(fileobj=binary_out, mode="wb") if compress else binary_out
+    text = io.TextIOWrapper(sink, encoding="utf-8", newline="")
+    try:
+        return write_rows(rows(supabase, division, start, end), columns, text, fmt)
+    finally:
+        text.flush()
+        text.detach()
+        if compress:
+            sink.close()
+
+
+def export_file_name(dataset, fmt, compress, division=None, start=None, end=None):
+    parts = [dataset]
+    if division:
+        parts.append(division.lower().replace(" ", "-"))
+    if start or end:
+        parts.append(f"{start or 'start'}_to_{end or 'now'}")
+    return "_".join(parts) + f".{fmt}" + (".gz" if compress else "")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the ledger, box scores or standings.")
+    parser.add_argument("dataset", choices=list(DATASETS))
+    parser.add_argument("--division", help="limit to one division (required for standings)")
+    parser.add_argument("--from", dest="start", type=date.fromisoformat, help="first game date, YYYY-MM-DD")
+    parser.add_argument("--to", dest="end", type=date.fromisoformat, help="last game date, YYYY-MM-DD")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--gzip", action="store_true", help="compress (implied by an -o ending in .gz)")
+    parser.add_argument("-o", "--output", help="file to write; default standard output")
+    args = parser.parse_args(argv)
+
+    if args.dataset == "standings" and not args.division:
+        parser.error("standings need --division")
+    compress = args.gzip or bool(args.output and args.output.endswith(".gz"))
+
+    from config.supabase import get_supabase_client
+
+    start, end = date_range_bounds(args.start, args.end)
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        count = export(get_supabase_client(), args.dataset, out, args.format, compress, args.division, start, end)
+    finally:
+        if args.output:
+            out.close()
+    print(f"Exported {count} {args.dataset} row(s).", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""
+Fast entry for the Live Scorer.
+
+A play is typed as a side, a jersey number and the points:
+
+    H23+2    home #23 scores 2
+    A5+3     away #5 scores 3
+    123+2    the same as H23+2 from a numeric keypad (1 = home, 2 = away)
+
+Several plays can be entered at once, separated by spaces or commas. Plays
+are resolved through a (side, jersey number) index of the two rosters,
+built once per game by jersey_index(), so reading a play is one dict
+lookup.
+"""
+import re
+
+HOME, AWAY = "H", "A"
+
+# Keypad digits stand in for the side letters
+SIDES = {"H": HOME, "A": AWAY, "1": HOME, "2": AWAY}
+
+PLAY_PATTERN = re.compile(r"([HA12])(\d{1,2})\+([123])")
+
+
+def jersey_index(home_team, home_players, away_team, away_players):
+    """{(side, jersey_number): (team_name, player_name)} for one game."""
+    index = {}
+    for side, team_name, players in ((HOME, home_team, home_players), (AWAY, away_team, away_players)):
+        for player in players:
+            index[(side, player['jersey_number'])] = (team_name, player['name'])
+    return index
+
+
+def read_plays(text, index):
+    """
+    Read the plays in text against a jersey index.
+
+    Returns (plays, errors). plays are (team_name, player_name, points)
+    tuples in the order typed; errors describes every play that could not
+    be read, in which case the caller should log none of them.
+    """
+    plays, errors = [], []
+    for token in re.split(r"[\s,]+", text.strip().upper()):
+        if not token:
+            continue
+        match = PLAY_PATTERN.fullmatch(token)
+        if not match:
+            errors.append(f"Can't read '{token}'. Type plays like H23+2 or A5+3.")
+            continue
+        side, jersey, points = SIDES[match.group(1)], int(match.group(2)), int(match.group(3))
+        player = index.get((side, jersey))
+        if player is None:
+            errors.append(f"'{token}': no #{jersey} on the {'home' if side == HOME else 'away'} team.")
+            continue
+        plays.append((*player, points))
+    return plays, errors
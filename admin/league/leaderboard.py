@@ -0,0 +1,126 @@
+"""
+Player leaderboards.
+
+Every category is built from one pass over the ledger: each player's
+totals are accumulated once, then each category keeps only its top K
+players with a heap instead of sorting the whole league. Adding a
+category adds a heap selection over players, not another pass over
+score_logs.
+
+Totals are computed with array operations on a ColumnarLedger
+(league/columnar.py) rather than by looping over ledger dicts.
+"""
+import heapq
+from collections import namedtuple
+
+import numpy as np
+
+from league.columnar import group_codes
+
+# column is the leaderboard header; min_games is the default number of
+# games a player needs before they qualify for that category
+Category = namedtuple("Category", ["name", "column", "value", "min_games"])
+
+CATEGORIES = [
+    Category("Points", "PTS", lambda p: p['PTS'], 0),
+    Category("Points Per Game", "PPG", lambda p: p['PPG'], 3),
+    Category("3-Pointers Made", "3PM", lambda p: p['3PM'], 0),
+    Category("Free Throws Made", "FTM", lambda p: p['FTM'], 0),
+    Category("Best Single Game", "BEST", lambda p: p['BEST'], 0),
+]
+
+CATEGORY_BY_NAME = {category.name: category for category in CATEGORIES}
+
+# Columns shown for every category, before the category's own column
+BASE_COLUMNS = ["Player", "Team", "GP", "PTS", "PPG"]
+
+
+def player_totals(ledger):
+    """
+    Per-player totals from a ColumnarLedger.
+
+    Players are keyed by (player_name, team_name) like the ledger itself.
+    """
+    if not len(ledger):
+        return []
+    first, player = group_codes(ledger.player, ledger.team)
+    size = len(first)
+    points = ledger.points.astype(np.int64)
+    total = np.bincount(player, weights=points, minlength=size)
+    threes = np.bincount(player, weights=points == 3, minlength=size)
+    free_throws = np.bincount(player, weights=points == 1, minlength=size)
+
+    # Points per (player, game) give games played and the best game
+    game_first, player_game = group_codes(player, ledger.game_id)
+    game_points = np.bincount(player_game, weights=points, minlength=len(game_first))
+    game_player = player[game_first]
+    games = np.bincount(game_player, minlength=size)
+    best = np.zeros(size)
+    np.maximum.at(best, game_player, game_points)
+
+    return [
+        {
+            'Player': ledger.player_names[ledger.player[row]],
+            'Team': ledger.team_names[ledger.team[row]],
+            'PTS': int(total[p]),
+            '3PM': int(threes[p]),
+            'FTM': int(free_throws[p]),
+            'GP': int(games[p]),
+            'PPG': round(total[p] / games[p], 1),
+            'BEST': int(best[p]),
+        }
+        for p, row in enumerate(first)
+    ]
+
+
+def box_score(ledger, game_id):
+    """
+    One game's scoring by player from a ColumnarLedger, grouped by team
+    with the top scorer first.
+    """
+    rows = np.flatnonzero(ledger.game_rows(game_id))
+    if not len(rows):
+        return []
+    first, player = group_codes(ledger.player[rows], ledger.team[rows])
+    points = ledger.points[rows].astype(np.int64)
+    made = {
+        value: np.bincount(player, weights=points == value, minlength=len(first))
+        for value in (1, 2, 3)
+    }
+    total = np.bincount(player, weights=points, minlength=len(first))
+
+    box = [
+        {
+            'Player': ledger.player_names[ledger.player[rows[row]]],
+            'Team': ledger.team_names[ledger.team[rows[row]]],
+            'PTS': int(total[p]),
+            'FTM': int(made[1][p]),
+            '2PM': int(made[2][p]),
+            '3PM': int(made[3][p]),
+        }
+        for p, row in enumerate(first)
+    ]
+    box.sort(key=lambda line: (line['Team'], -line['PTS'], line['Player']))
+    return box
+
+
+def leaderboards(ledger, categories=CATEGORIES, k=15, min_games=None):
+    """
+    Top k players for each category of a ColumnarLedger, as
+    {category name: [rows]}.
+
+    min_games optionally overrides the category defaults by name.
+    """
+    players = player_totals(ledger)
+    min_games = min_games or {}
+
+    boards = {}
+    for category in categories:
+        threshold = min_games.get(category.name, category.min_games)
+        eligible = (p for p in players if p['GP'] >= threshold)
+        top = heapq.nlargest(k, eligible, key=lambda p: (category.value(p), p['PTS']))
+        boards[category.name] = [
+            {'Rank': rank, **{c: p[c] for c in BASE_COLUMNS}, category.column: category.value(p)}
+            for rank, p in enumerate(top, 1)
+        ]
+    return boards
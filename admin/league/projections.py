@@ -0,0 +1,289 @@
+"""
+Monte Carlo playoff odds and projected standings.
+
+The rest of the season (every game not yet final) is simulated many times
+at once with NumPy: one row per simulation, one column per remaining
+game. Each team gets an offensive and a defensive rating from its final
+games (points for and against per game relative to the league average,
+shrunk towards average while it has played few games), and a game's
+expected score is the league average plus the scoring team's offence
+plus the other team's defence, with normally distributed noise.
+
+Every simulated season is then ordered with the same rules as
+standings.rank_teams(): wins, head-to-head record and point differential
+among the teams tied on wins, overall differential, points for, name,
+starting again from head-to-head for any group a tiebreaker leaves tied.
+"""
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+DEFAULT_SIMULATIONS = 20_000
+
+# Games of evidence a rating needs to count as much as the league average
+RATING_SHRINKAGE_GAMES = 3
+
+# Used until there are enough final games to measure them
+DEFAULT_POINTS_PER_GAME = 50.0
+DEFAULT_SCORE_SD = 10.0
+MIN_GAMES_FOR_SD = 10
+
+# Simulations per array pass; the head-to-head arrays hold
+# chunk x teams x teams values
+CHUNK_SIMULATIONS = 10_000
+
+
+@dataclass
+class Season:
+    """
+    The season so far, as arrays indexed by team.
+
+    wins[i, j] and margin[i, j] are team i's wins over and points margin
+    against team j in final games, like MatchupMatrix. home/away are the
+    team indexes of each remaining game, expected_home/expected_away
+    their expected scores.
+    """
+    teams: list
+    wins: np.ndarray
+    margin: np.ndarray
+    points_for: np.ndarray
+    points_against: np.ndarray
+    home: np.ndarray
+    away: np.ndarray
+    expected_home: np.ndarray
+    expected_away: np.ndarray
+    score_sd: float
+
+
+def season_fingerprint(results, remaining_games):
+    """
+    Identifies the inputs of a projection: final results (including any
+    corrections to them) and the remaining schedule. Changes only when a
+    game is finalized, corrected, scheduled or removed.
+    """
+    digest = hashlib.sha1()
+    for game_id in sorted(results):
+        digest.update(repr((game_id, *results[game_id])).encode())
+    digest.update(b"|")
+    for game in sorted(remaining_games, key=lambda game: game['id']):
+        digest.update(repr((game['id'], game['home_team_name'], game['away_team_name'])).encode())
+    return digest.hexdigest()
+
+
+def build_season(team_names, results, remaining_games):
+    """
+    team_names: every team to rank. results: {game_id: (home, away,
+    home_pts, away_pts)} of final games, as from standings.game_results().
+    remaining_games: game rows still to be played.
+    """
+    teams = sorted(set(team_names).union(
+        name for game in remaining_games for name in (game['home_team_name'], game['away_team_name'])
+    ).union(
+        name for home, away, _, _ in results.values() for name in (home, away)
+    ))
+    index = {name: i for i, name in enumerate(teams)}
+    n = len(teams)
+
+    wins = np.zeros((n, n), dtype=np.int32)
+    margin = np.zeros((n, n), dtype=np.int32)
+    points_for = np.zeros(n, dtype=np.int64)
+    points_against = np.zeros(n, dtype=np.int64)
+    played = np.zeros(n, dtype=np.int64)
+    scores = []
+    for home, away, home_pts, away_pts in results.values():
+        h, a = index[home], index[away]
+        margin[h, a] += home_pts - away_pts
+        margin[a, h] += away_pts - home_pts
+        if home_pts > away_pts:
+            wins[h, a] += 1
+        elif away_pts > home_pts:
+            wins[a, h] += 1
+        points_for[h] += home_pts
+        points_for[a] += away_pts
+        points_against[h] += away_pts
+        points_against[a] += home_pts
+        played[h] += 1
+        played[a] += 1
+        scores += [home_pts, away_pts]
+
+    league_average = float(np.mean(scores)) if scores else DEFAULT_POINTS_PER_GAME
+    score_sd = float(np.std(scores)) if len(scores) >= MIN_GAMES_FOR_SD else DEFAULT_SCORE_SD
+    with np.errstate(invalid="ignore", divide="ignore"):
+        weight = played / (played + RATING_SHRINKAGE_GAMES)
+        offence = np.nan_to_num(points_for / played - league_average) * weight
+        defence = np.nan_to_num(points_against / played - league_average) * weight
+
+    home = np.array([index[game['home_team_name']] for game in remaining_games], dtype=np.int64)
+    away = np.array([index[game['away_team_name']] for game in remaining_games], dtype=np.int64)
+    return Season(
+        teams=teams,
+        wins=wins,
+        margin=margin,
+        points_for=points_for,
+        points_against=points_against,
+        home=home,
+        away=away,
+        expected_home=league_average + offence[home] + defence[away],
+        expected_away=league_average + offence[away] + defence[home],
+        score_sd=score_sd,
+    )
+
+
+def _group_labels(*keys):
+    """
+    Number the teams of every simulation by keys (most significant first,
+    smallest first) from 0, giving teams equal on every key the same
+    number. keys are (simulations, teams) arrays.
+    """
+    order = np.lexsort(keys[::-1], axis=-1)
+    starts_group = np.zeros(order.shape, dtype=bool)
+    for key in keys:
+        ordered = np.take_along_axis(key, order, axis=-1)
+        starts_group[:, 1:] |= ordered[:, 1:] != ordered[:, :-1]
+    labels = np.empty_like(order)
+    np.put_along_axis(labels, order, np.cumsum(starts_group, axis=-1), axis=-1)
+    return labels
+
+
+def rank_simulations(wins, margin, points_for, points_against):
+    """
+    Order every simulated season by the standings.rank_teams() rules.
+
+    wins and margin are (simulations, teams, teams), points_for and
+    points_against (simulations, teams). Returns (simulations, teams)
+    team indexes, best first. Teams are indexed in name order, so the
+    index is the final tiebreak.
+    """
+    simulations, n = points_for.shape
+    h2h_record = wins - wins.transpose(0, 2, 1)
+    # Whether each pair of teams differs on the tiebreakers that don't
+    # depend on the group
+    overall = [
+        (values, values[:, :, None] != values[:, None, :])
+        for values in (points_for - points_against, points_for)
+    ]
+
+    # Teams in the same group are still tied; groups are numbered best
+    # first. Each pass splits every group on the first tiebreaker that
+    # tells its teams apart, and the next pass looks only at the
+    # simulations in which a group split.
+    group = _group_labels(-wins.sum(axis=2))
+    active = np.arange(simulations)
+    while active.size:
+        rows = slice(None) if active.size == simulations else active
+        current = group[rows]
+        # Head-to-head only within the group (a team's own diagonal
+        # entries are zero, so it can stay in its group)
+        same = current[:, :, None] == current[:, None, :]
+        tiebreakers = [
+            (values, values[:, :, None] != values[:, None, :])
+            for values in (
+                (h2h_record[rows] * same).sum(axis=2),
+                (margin[rows] * same).sum(axis=2),
+            )
+        ] + [(values[rows], differ[rows]) for values, differ in overall]
+        split_on = np.zeros_like(current)
+        decided = np.zeros(current.shape, dtype=bool)
+        for values, differ in tiebreakers:
+            # The same for every team in a group: whether the group's
+            # teams differ on this tiebreaker
+            differs = (same & differ).any(axis=2)
+            split_on = np.where(differs & ~decided, values, split_on)
+            decided |= differs
+        refined = _group_labels(current, -split_on)
+        split = (refined != current).any(axis=1)
+        group[rows] = refined
+        active = active[split]
+
+    name_order = np.broadcast_to(np.arange(n), (simulations, n))
+    # lexsort sorts by the last key first
+    return np.lexsort((name_order, group), axis=-1)
+
+
+def simulate(season, simulations, seed=None):
+    """
+    Play out the remaining games simulations times. Returns
+    (seed_counts, total_wins): seed_counts[i, k] is how often team i
+    finished in place k, total_wins the sum of its wins over all runs.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(season.teams)
+    home_pts = np.maximum(np.rint(rng.normal(season.expected_home, season.score_sd, (simulations, len(season.home)))), 0)
+    away_pts = np.maximum(np.rint(rng.normal(season.expected_away, season.score_sd, (simulations, len(season.away)))), 0)
+    home_pts, away_pts = home_pts.astype(np.int32), away_pts.astype(np.int32)
+
+    wins = np.broadcast_to(season.wins, (simulations, n, n)).copy()
+    margin = np.broadcast_to(season.margin, (simulations, n, n)).copy()
+    points_for = np.broadcast_to(season.points_for, (simulations, n)).copy()
+    points_against = np.broadcast_to(season.points_against, (simulations, n)).copy()
+
+    for g, (h, a) in enumerate(zip(season.home, season.away)):
+        diff = home_pts[:, g] - away_pts[:, g]
+        wins[:, h, a] += diff > 0
+        wins[:, a, h] += diff < 0
+        margin[:, h, a] += diff
+        margin[:, a, h] -= diff
+        points_for[:, h] += home_pts[:, g]
+        points_for[:, a] += away_pts[:, g]
+        points_against[:, h] += away_pts[:, g]
+        points_against[:, a] += home_pts[:, g]
+
+    order = rank_simulations(wins, margin, points_for, points_against)
+    seed_counts = np.zeros((n, n), dtype=np.int64)
+    for place in range(n):
+        seed_counts[:, place] = np.bincount(order[:, place], minlength=n)
+    return seed_counts, wins.sum(axis=(0, 2))
+
+
+def project(season, simulations=DEFAULT_SIMULATIONS, workers=1, seed=None):
+    """
+    Simulate the rest of the season and summarise it per team.
+
+    Simulations run in chunks of CHUNK_SIMULATIONS to bound memory; with
+    workers > 1 the chunks are spread over a process pool.
+    Returns {'teams', 'seed_probabilities' (teams x places), 'projected_wins',
+    'remaining_games'}.
+    """
+    chunks = [CHUNK_SIMULATIONS] * (simulations // CHUNK_SIMULATIONS)
+    if simulations % CHUNK_SIMULATIONS:
+        chunks.append(simulations % CHUNK_SIMULATIONS)
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            parts = list(pool.map(simulate, [season] * len(chunks), chunks, seeds))
+    else:
+        parts = [simulate(season, size, chunk_seed) for size, chunk_seed in zip(chunks, seeds)]
+
+    return {
+        'teams': season.teams,
+        'seed_probabilities': sum(part[0] for part in parts) / simulations,
+        'projected_wins': sum(part[1] for part in parts) / simulations,
+        'remaining_games': len(season.home),
+    }
+
+
+def playoff_table(projection, current_records, playoff_spots):
+    """
+    Rows for display, best playoff odds first: projected record, average
+    seed, playoff probability and the probability of each seed.
+    """
+    probabilities = projection['seed_probabilities']
+    places = np.arange(1, probabilities.shape[1] + 1)
+    rows = []
+    for i, team in enumerate(projection['teams']):
+        wins, losses = current_records.get(team, (0, 0))
+        row = {
+            'Team': team,
+            'Record': f"{wins}-{losses}",
+            'Proj. W': round(float(projection['projected_wins'][i]), 1),
+            'Avg Seed': round(float(probabilities[i] @ places), 1),
+            'Playoffs %': round(100 * float(probabilities[i, :playoff_spots].sum()), 1),
+        }
+        for place in places:
+            row[f"#{place} %"] = round(100 * float(probabilities[i, place - 1]), 1)
+        rows.append(row)
+    rows.sort(key=lambda row: (-row['Playoffs %'], row['Avg Seed'], row['Team']))
+    return rows
@@ -0,0 +1,143 @@
+"""
+Team power ratings: Elo, adjusted for the margin of victory.
+
+Every team starts at INITIAL_RATING. After a final game the winner takes
+rating points from the loser: K_FACTOR times how much better it did than
+expected, scaled up for bigger margins and down when a much stronger
+team wins as expected (so blowouts by favourites don't inflate ratings).
+
+Games are rated in schedule order, (start_time, id). Ratings are stored
+in teams.rating, with one team_rating_history row per team per final
+game. End Game rates its one game in the database (end_game() in
+database/schema.sql, the same formula), unless either team already has
+a later final game. Then, and when past results change (ledger
+corrections, games edited or deleted), recompute() replays the whole
+division's history, vectorized over rounds of games in which no team
+plays twice.
+"""
+import numpy as np
+
+from league.standings import game_results
+
+# These and _rating_shift() are repeated in end_game() in
+# database/schema.sql; change both together
+INITIAL_RATING = 1500.0
+K_FACTOR = 20.0
+
+# Rating points added to the home team's expected score; most games are
+# played at shared gyms, so none
+HOME_ADVANTAGE = 0.0
+
+
+def _rating_shift(home_rating, away_rating, home_pts, away_pts):
+    """
+    Points the home team gains (negative: loses) from a game. Works
+    element-wise on arrays of games as well as on single values.
+    """
+    home_lead = home_rating + HOME_ADVANTAGE - away_rating
+    expected = 1.0 / (1.0 + 10.0 ** (-home_lead / 400.0))
+    margin = home_pts - away_pts
+    actual = np.where(margin > 0, 1.0, np.where(margin < 0, 0.0, 0.5))
+    # The winner's rating lead; ties count as no lead
+    winner_lead = np.sign(margin) * home_lead
+    multiplier = (np.abs(margin) + 3.0) ** 0.8 / (7.5 + 0.006 * winner_lead)
+    return K_FACTOR * multiplier * (actual - expected)
+
+
+def _rounds(home, away):
+    """
+    Split games, in order, into consecutive rounds in which no team plays
+    twice, so each round can be rated at once with the same result as
+    rating its games one by one. Returns the start index of every round.
+    """
+    starts, playing = [], set()
+    for g, (h, a) in enumerate(zip(home, away)):
+        if not starts or h in playing or a in playing:
+            starts.append(g)
+            playing = set()
+        playing.update((h, a))
+    return starts
+
+
+def recompute(team_names, games, results):
+    """
+    Replay every final game in start_time order.
+
+    games: game rows (for the order); results: {game_id: (home, away,
+    home_pts, away_pts)} as from standings.game_results(). Returns
+    (ratings, history): {team_name: rating} for every team, and one
+    {game_id, team_name, rating_before, rating_after} row per team per game.
+    """
+    ordered = sorted(
+        (game for game in games if game['id'] in results),
+        key=lambda game: (game['start_time'], game['id'])
+    )
+    teams = sorted(set(team_names).union(
+        name for game in ordered for name in results[game['id']][:2]
+    ))
+    index = {name: i for i, name in enumerate(teams)}
+
+    game_ids = [game['id'] for game in ordered]
+    home = np.array([index[results[game_id][0]] for game_id in game_ids], dtype=np.int64)
+    away = np.array([index[results[game_id][1]] for game_id in game_ids], dtype=np.int64)
+    home_pts = np.array([results[game_id][2] for game_id in game_ids], dtype=np.float64)
+    away_pts = np.array([results[game_id][3] for game_id in game_ids], dtype=np.float64)
+
+    ratings = np.full(len(teams), INITIAL_RATING)
+    home_before = np.empty(len(game_ids))
+    away_before = np.empty(len(game_ids))
+    shifts = np.empty(len(game_ids))
+    bounds = _rounds(home.tolist(), away.tolist()) + [len(game_ids)]
+    for start, end in zip(bounds, bounds[1:]):
+        h, a = home[start:end], away[start:end]
+        home_before[start:end] = ratings[h]
+        away_before[start:end] = ratings[a]
+        shifts[start:end] = _rating_shift(ratings[h], ratings[a], home_pts[start:end], away_pts[start:end])
+        # No team appears twice in a round, so these don't collide
+        ratings[h] += shifts[start:end]
+        ratings[a] -= shifts[start:end]
+
+    history = []
+    for g, game_id in enumerate(game_ids):
+        history.append(history_row(game_id, teams[home[g]], home_before[g], home_before[g] + shifts[g]))
+        history.append(history_row(game_id, teams[away[g]], away_before[g], away_before[g] - shifts[g]))
+    return {name: float(ratings[i]) for i, name in enumerate(teams)}, history
+
+
+def history_row(game_id, team_name, rating_before, rating_after):
+    return {
+        'game_id': int(game_id),
+        'team_name': team_name,
+        'rating_before': float(rating_before),
+        'rating_after': float(rating_after),
+    }
+
+
+def save_ratings(supabase, division, ratings, history):
+    """
+    Replace a division's ratings and history with a recompute() in one
+    transaction. Fails if a game was ended or reopened in the meantime.
+    """
+    supabase.rpc("save_team_ratings", {
+        "division": division,
+        "ratings": [{'team_name': name, 'rating': rating} for name, rating in ratings.items()],
+        "history": history,
+    }).execute()
+
+
+def recompute_division(supabase, division, ledger):
+    """
+    Recompute a division's ratings and history from its final games and
+    a (synced) LedgerReplica, and store them. Returns {team_name: rating}.
+    """
+    teams = supabase.table("teams").select("name").eq("division_name", division).execute().data
+    games = (
+        supabase.table("games").select("*")
+        .eq("division_name", division).eq("status", "final")
+        .execute()
+        .data
+    )
+    results = game_results(games, ledger.columnar().game_totals())
+    ratings, history = recompute([team['name'] for team in teams], games, results)
+    save_ratings(supabase, division, ratings, history)
+    return ratings
@@ -0,0 +1,53 @@
+"""
+Reconcile team records against the ledger.
+
+teams.wins/losses are written incrementally by the End Game handler and
+drift whenever a final game is edited back to live, deleted, or corrected
+with Undo. The reconcile_team_records() database function (see
+database/schema.sql) recomputes every record from final games and
+score_logs in one set-based query, and can repair them in one transaction.
+
+Run from the admin/ directory, e.g. as a nightly job:
+
+    python -m league.reconcile            # report only
+    python -m league.reconcile --repair   # report and fix
+"""
+import argparse
+import sys
+
+
+def reconcile_team_records(supabase, repair=False):
+    """Return teams whose stored record disagrees with the ledger, fixing them if repair is set."""
+    response = supabase.rpc("reconcile_team_records", {"repair": repair}).execute()
+    return response.data
+
+
+def format_discrepancy(row):
+    return (
+        f"{row['team']}: stored {row['stored_wins']}-{row['stored_losses']}, "
+        f"ledger says {row['expected_wins']}-{row['expected_losses']}"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check team records against the score ledger.")
+    parser.add_argument("--repair", action="store_true", help="correct the stored records")
+    args = parser.parse_args(argv)
+
+    from config.supabase import get_supabase_client
+
+    discrepancies = reconcile_team_records(get_supabase_client(), repair=args.repair)
+    if not discrepancies:
+        print("All team records match the ledger.")
+        return 0
+
+    for row in discrepancies:
+        print(format_discrepancy(row))
+    if args.repair:
+        print(f"Repaired {len(discrepancies)} team record(s).")
+        return 0
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+"""
+Local SQLite replica of the score_logs ledger.
+
+The ledger is append-only apart from Undo deletes, so instead of re-downloading
+the whole table the replica pulls only rows above the highest id it has seen,
+plus the rows recorded in score_log_tombstones by the delete trigger
+(see database/schema.sql). Reads and aggregations then run locally.
+
+Ids are handed out before inserts commit, so a row can commit after rows
+with higher ids and land below the watermark. Each sync re-reads the last
+LATE_COMMIT_OVERLAP ids, which covers two scorers tapping at once. A row
+delayed past more inserts than that is caught by comparing the replica's
+row count with Supabase's every RECONCILE_INTERVAL seconds: when rows are
+missing, the division's whole ledger is read again.
+
+Each division has its own replica file, so scoring in one division never
+adds rows for another division's replica to download.
+
+Aggregations use a ColumnarLedger copy held in memory, which sync() keeps
+up to date with the same rows it writes to SQLite.
+"""
+import sqlite3
+import threading
+import time
+
+from league.columnar import ColumnarLedger
+
+# PostgREST caps responses at 1000 rows by default
+PAGE_SIZE = 1000
+
+# Re-read this many ids below the watermark on every sync so that inserts
+# which committed out of id order (two scorers at once) are not skipped
+LATE_COMMIT_OVERLAP = 50
+
+# Seconds between row count checks for inserts that committed later still
+RECONCILE_INTERVAL = 60
+
+LEDGER_COLUMNS = ("id", "game_id", "player_name", "team_name", "points", "created_at")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS score_logs (
+    id INTEGER PRIMARY KEY,
+    game_id INTEGER NOT NULL,
+    player_name TEXT NOT NULL,
+    team_name TEXT NOT NULL,
+    points INTEGER NOT NULL,
+    created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_score_logs_game_team ON score_logs(game_id, team_name);
+CREATE INDEX IF NOT EXISTS idx_score_logs_game_created ON score_logs(game_id, created_at);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    name TEXT PRIMARY KEY,
+    watermark INTEGER NOT NULL
+);
+"""
+
+
+class LedgerReplica:
+    """
+    Keeps a local copy of one division's score_logs in step with Supabase.
+
+    Call sync() before reading; it costs two small requests when nothing
+    has changed, and a third once every RECONCILE_INTERVAL seconds. Safe to
+    share between Streamlit sessions.
+    """
+
+    def __init__(self, supabase, path, division):
+        self.supabase = supabase
+        self.division = division
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(_SCHEMA)
+        self._columnar = None
+
+    # ------------------------------------------
+    # Syncing
+    # ------------------------------------------
+    def sync(self):
+        """Pull new ledger rows and deletions. Returns (inserted, deleted)."""
+        with self._lock:
+            tombstone_mark = self._get_watermark("score_log_tombstones")
+            if tombstone_mark is None:
+                # Fresh replica: deletions before now are already reflected
+                # in the rows we are about to download
+                tombstone_mark = self._latest_tombstone_id()
+                with self._conn:
+                    self._set_watermark("score_log_tombstones", tombstone_mark)
+
+            # Pull inserts before deletions so a row deleted mid-sync is
+            # always removed by this sync or the next one
+            log_mark = self._get_watermark("score_logs") or 0
+            inserted = self._pull_logs(max(log_mark - LATE_COMMIT_OVERLAP, 0))
+
+            deleted = 0
+            for page in self._pages("score_log_tombstones", "id,score_log_id", tombstone_mark):
+                with self._conn:
+                    cursor = self._conn.executemany(
+                        "DELETE FROM score_logs WHERE id = ?",
+                        [(row['score_log_id'],) for row in page],
+                    )
+                    self._set_watermark("score_log_tombstones", page[-1]['id'])
+                if self._columnar is not None:
+                    self._columnar.delete(row['score_log_id'] for row in page)
+                deleted += cursor.rowcount
+
+            # After the deletions, so that only missing rows make the
+            # replica hold fewer rows than Supabase
+            now = int(time.time())
+            if now - (self._get_watermark("reconciled_at") or 0) >= RECONCILE_INTERVAL:
+                log_mark = self._get_watermark("score_logs") or 0
+                if self._remote_count(log_mark) > self._local_count(log_mark):
+                    inserted += self._pull_logs(0)
+                with self._conn:
+                    self._set_watermark("reconciled_at", now)
+
+            with self._conn:
+                self._set_watermark("synced_at", now)
+            return inserted, deleted
+
+    def _pull_logs(self, after_id):
+        """Store ledger rows above after_id. Returns the number that were new."""
+        inserted = 0
+        for page in self._pages("score_logs", ",".join(LEDGER_COLUMNS), after_id):
+            with self._conn:
+                # Ledger rows never change, so rows read again are skipped
+                cursor = self._conn.executemany(
+                    "INSERT OR IGNORE INTO score_logs (id, game_id, player_name, team_name, points, created_at) "
+                    "VALUES (:id, :game_id, :player_name, :team_name, :points, :created_at)",
+                    page,
+                )
+                log_mark = max(self._get_watermark("score_logs") or 0, page[-1]['id'])
+                self._set_watermark("score_logs", log_mark)
+            if self._columnar is not None:
+                self._columnar.extend(tuple(row[column] for column in LEDGER_COLUMNS) for row in page)
+            inserted += cursor.rowcount
+        return inserted
+
+    def _remote_count(self, max_id):
+        return (
+            self.supabase.table("score_logs")
+            .select("id", count="exact", head=True)
+            .eq("division_name", self.division)
+            .lte("id", max_id)
+            .execute()
+            .count
+        )
+
+    def _local_count(self, max_id):
+        return self._conn.execute("SELECT COUNT(*) FROM score_logs WHERE id <= ?", (max_id,)).fetchone()[0]
+
+    @property
+    def synced_at(self):
+        """Epoch seconds of the last successful sync, or None."""
+        with self._lock:
+            return self._get_watermark("synced_at")
+
+    def _pages(self, table, columns, after_id):
+        while True:
+            rows = (
+                self.supabase.table(table)
+                .select(columns)
+                .eq("division_name", self.division)
+                .gt("id", after_id)
+                .order("id")
+                .limit(PAGE_SIZE)
+                .execute()
+                .data
+            )
+            if not rows:
+                return
+            yield rows
+            if len(rows) < PAGE_SIZE:
+                return
+            after_id = rows[-1]['id']
+
+    def _latest_tombstone_id(self):
+        rows = (
+            self.supabase.table("score_log_tombstones")
+            .select("id")
+            .eq("division_name", self.division)
+            .order("id", desc=True)
+            .limit(1)
+            .execute()
+            .data
+        )
+        return rows[0]['id'] if rows else 0
+
+    def _get_watermark(self, name):
+        row = self._conn.execute("SELECT watermark FROM sync_state WHERE name = ?", (name,)).fetchone()
+        return row['watermark'] if row else None
+
+    def _set_watermark(self, name, value):
+        self._conn.execute(
+            "INSERT INTO sync_state (name, watermark) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET watermark = excluded.watermark",
+            (name, value),
+        )
+
+    # ------------------------------------------
+    # Reads
+    # ------------------------------------------
+    def _query(self, sql, params=()):
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def rows(self, game_id=None):
+        """Ledger rows in the same shape PostgREST returns them."""
+        if game_id is None:
+            return self._query("SELECT * FROM score_logs ORDER BY id")
+        return self._query("SELECT * FROM score_logs WHERE game_id = ? ORDER BY id", (game_id,))
+
+    def team_score(self, game_id, team_name):
+        rows = self._query(
+            "SELECT COALESCE(SUM(points), 0) AS total FROM score_logs WHERE game_id = ? AND team_name = ?",
+            (game_id, team_name),
+        )
+        return rows[0]['total']
+
+    def columnar(self):
+        """
+        The ledger as a ColumnarLedger snapshot, as of the last sync.
+
+        Loaded from SQLite on first use; later syncs apply only their own
+        inserts and deletions to it.
+        """
+        with self._lock:
+            if self._columnar is None:
+                cursor = self._conn.execute(f"SELECT {', '.join(LEDGER_COLUMNS)} FROM score_logs ORDER BY id")
+                self._columnar = ColumnarLedger(tuple(row) for row in cursor)
+            return self._columnar.snapshot()
+
+    def recent(self, game_id, limit=10):
+        return self.play_by_play(game_id, limit=limit)
+
+    def play_by_play(self, game_id, before=None, limit=25):
+        """
+        One page of a game's ledger, newest first.
+
+        Keyset pagination on (created_at, id): pass the (created_at, id) of
+        the last row of a page as before to get the next one. Each page is
+        a range scan of idx_score_logs_game_created however deep it is.
+        """
+        if before is None:
+            return self._query(
+                "SELECT * FROM score_logs WHERE game_id = ? ORDER BY created_at DESC, id DESC LIMIT ?",
+                (game_id, limit),
+            )
+        return self._query(
+            "SELECT * FROM score_logs WHERE game_id = ? AND (created_at, id) < (?, ?) "
+            "ORDER BY created_at DESC, id DESC LIMIT ?",
+            (game_id, *before, limit),
+        )
@@ -0,0 +1,97 @@
+"""
+Bulk roster edits.
+
+The Players page edits rosters in a grid. roster_changes() diffs the edited
+rows against the players they were loaded from, validate_roster() checks the
+resulting league roster against a per-team jersey index before anything is
+sent, and apply_roster_changes() writes every insert, update and delete in a
+single request (the apply_roster_changes database function, see
+database/schema.sql), so jersey swaps are fine within one save.
+"""
+
+ROSTER_FIELDS = ("name", "team_name", "jersey_number")
+
+
+def _is_blank(value):
+    # Grid cells come back as None or NaN when left empty
+    return value is None or value != value
+
+
+def _fields(row):
+    name = row.get('name')
+    jersey = row.get('jersey_number')
+    team = row.get('team_name')
+    return {
+        'name': '' if _is_blank(name) else str(name).strip(),
+        'team_name': None if _is_blank(team) else team,
+        'jersey_number': None if _is_blank(jersey) else int(jersey),
+    }
+
+
+def roster_changes(original, edited):
+    """
+    Diff edited grid rows against the players they were loaded from.
+
+    Rows without an id are new players; loaded players missing from the
+    grid were deleted. Returns (inserts, updates, deletes).
+    """
+    by_id = {player['id']: player for player in original}
+    inserts, updates, seen = [], [], set()
+
+    for row in edited:
+        fields = _fields(row)
+        if _is_blank(row.get('id')):
+            if any(value not in ('', None) for value in fields.values()):
+                inserts.append(fields)
+            continue
+
+        player_id = int(row['id'])
+        seen.add(player_id)
+        player = by_id.get(player_id)
+        if player and any(player[field] != fields[field] for field in ROSTER_FIELDS):
+            updates.append({'id': player_id, **fields})
+
+    deletes = [player_id for player_id in by_id if player_id not in seen]
+    return inserts, updates, deletes
+
+
+def validate_roster(all_players, inserts, updates, deletes):
+    """
+    Return a list of problems with the league roster once the changes apply.
+
+    all_players must be the whole league, not just the edited team, so that
+    a player moved to another team is checked against that team's numbers.
+    """
+    roster = {player['id']: {field: player[field] for field in ROSTER_FIELDS} for player in all_players}
+    for player_id in deletes:
+        roster.pop(player_id, None)
+    for update in updates:
+        roster[update['id']] = {field: update[field] for field in ROSTER_FIELDS}
+
+    errors = []
+    jersey_index = {}
+    for player in list(roster.values()) + inserts:
+        label = player['name'] or "A player"
+        if not player['name']:
+            errors.append("Every player needs a name.")
+        if player['team_name'] is None:
+            errors.append(f"{label} has no team.")
+            continue
+        if player['jersey_number'] is None or not 0 <= player['jersey_number'] <= 99:
+            errors.append(f"{label} needs a jersey number from 0 to 99.")
+            continue
+        jersey_index.setdefault((player['team_name'], player['jersey_number']), []).append(label)
+
+    for (team_name, jersey_number), names in sorted(jersey_index.items()):
+        if len(names) > 1:
+            errors.append(f"{team_name}: jersey #{jersey_number} is shared by {', '.join(names)}.")
+    return list(dict.fromkeys(errors))
+
+
+def apply_roster_changes(supabase, inserts, updates, deletes):
+    """Write all roster changes in one request and one transaction."""
+    supabase.rpc("apply_roster_changes", {
+        "inserts": inserts,
+        "updates": updates,
+        "deletes": deletes,
+    }).execute()
@@ -0,0 +1,183 @@
+"""
+Standings with head-to-head tiebreakers.
+
+Teams are ordered by wins. Teams level on wins are separated, in order, by:
+  1. Head-to-head record against the other tied teams (wins minus losses)
+  2. Head-to-head point differential against the other tied teams
+  3. Overall point differential
+  4. Points for
+and finally by name so the order is always deterministic. The first
+tiebreaker that tells any of the tied teams apart splits them into
+groups, and each group still tied starts again from 1, with head-to-head
+counted among that group only.
+
+The head-to-head numbers come from a team x team matrix of final game
+results that is updated one game at a time, so re-ranking after a game
+is finalized does not need another pass over the ledger.
+"""
+import threading
+
+
+class MatchupMatrix:
+    """
+    Head-to-head wins and point margins between every pair of teams.
+
+    wins[i][j] is how many times team i beat team j, margin[i][j] is the
+    points team i outscored team j by across all their meetings.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._index = {}
+        self.wins = []
+        self.margin = []
+        self.points_for = []
+        self.points_against = []
+        self._games = {}
+
+    def _team(self, name):
+        if name not in self._index:
+            self._index[name] = len(self._index)
+            for row in self.wins:
+                row.append(0)
+            for row in self.margin:
+                row.append(0)
+            size = len(self._index)
+            self.wins.append([0] * size)
+            self.margin.append([0] * size)
+            self.points_for.append(0)
+            self.points_against.append(0)
+        return self._index[name]
+
+    def _apply(self, result, sign):
+        home, away, home_pts, away_pts = result
+        h, a = self._team(home), self._team(away)
+        self.margin[h][a] += sign * (home_pts - away_pts)
+        self.margin[a][h] += sign * (away_pts - home_pts)
+        self.points_for[h] += sign * home_pts
+        self.points_for[a] += sign * away_pts
+        self.points_against[h] += sign * away_pts
+        self.points_against[a] += sign * home_pts
+        if home_pts > away_pts:
+            self.wins[h][a] += sign
+        elif away_pts > home_pts:
+            self.wins[a][h] += sign
+
+    def add_game(self, game_id, home, away, home_pts, away_pts):
+        """Record a final game, replacing any earlier result for the same game."""
+        with self._lock:
+            if game_id in self._games:
+                self._apply(self._games.pop(game_id), -1)
+            result = (home, away, home_pts, away_pts)
+            self._apply(result, 1)
+            self._games[game_id] = result
+
+    def remove_game(self, game_id):
+        """Forget a game that is no longer final (edited back, deleted)."""
+        with self._lock:
+            if game_id in self._games:
+                self._apply(self._games.pop(game_id), -1)
+
+    def sync(self, results):
+        """
+        Bring the matrix in line with {game_id: (home, away, home_pts, away_pts)}.
+
+        Only games that are new, changed or gone are applied.
+        """
+        with self._lock:
+            for game_id in [g for g in self._games if g not in results]:
+                self.remove_game(game_id)
+            for game_id, result in results.items():
+                if self._games.get(game_id) != tuple(result):
+                    self.add_game(game_id, *result)
+
+    def head_to_head(self, team, opponents):
+        """(wins minus losses, point differential) of team against opponents."""
+        with self._lock:
+            i = self._index.get(team)
+            if i is None:
+                return 0, 0
+            record = diff = 0
+            for opponent in opponents:
+                j = self._index.get(opponent)
+                if j is None or j == i:
+                    continue
+                record += self.wins[i][j] - self.wins[j][i]
+                diff += self.margin[i][j]
+            return record, diff
+
+    def teams(self):
+        """Every team with a final game, in the order first seen."""
+        with self._lock:
+            return list(self._index)
+
+    def record(self, team):
+        """(wins, losses) across all final games."""
+        with self._lock:
+            i = self._index.get(team)
+            if i is None:
+                return 0, 0
+            return sum(self.wins[i]), sum(row[i] for row in self.wins)
+
+    def totals(self, team):
+        """(points for, points against) across all final games."""
+        with self._lock:
+            i = self._index.get(team)
+            if i is None:
+                return 0, 0
+            return self.points_for[i], self.points_against[i]
+
+
+def game_results(games, game_totals):
+    """
+    Build {game_id: (home, away, home_pts, away_pts)} for final games.
+
+    game_totals maps (game_id, team_name) to points scored.
+    """
+    return {
+        game['id']: (
+            game['home_team_name'],
+            game['away_team_name'],
+            game_totals.get((game['id'], game['home_team_name']), 0),
+            game_totals.get((game['id'], game['away_team_name']), 0),
+        )
+        for game in games
+    }
+
+
+def rank_teams(teams, matrix):
+    """
+    Order teams (rows from the teams table) using the tiebreakers above.
+
+    Returns dicts with Team, W, L, PF and PA, best team first.
+    """
+    rows = {}
+    for team in teams:
+        pf, pa = matrix.totals(team['name'])
+        rows[team['name']] = {'Team': team['name'], 'W': team['wins'], 'L': team['losses'], 'PF': pf, 'PA': pa}
+
+    ranked = []
+    for wins in sorted({row['W'] for row in rows.values()}, reverse=True):
+        ranked.extend(_break_tie([name for name, row in rows.items() if row['W'] == wins], rows, matrix))
+    return [rows[name] for name in ranked]
+
+
+def _break_tie(names, rows, matrix):
+    """Order teams that are level on every tiebreaker before these."""
+    if len(names) < 2:
+        return names
+
+    tiebreakers = (
+        lambda name: matrix.head_to_head(name, names)[0],
+        lambda name: matrix.head_to_head(name, names)[1],
+        lambda name: rows[name]['PF'] - rows[name]['PA'],
+        lambda name: rows[name]['PF'],
+    )
+    for tiebreaker in tiebreakers:
+        values = {name: tiebreaker(name) for name in names}
+        if len(set(values.values())) > 1:
+            ranked = []
+            for value in sorted(set(values.values()), reverse=True):
+                ranked.extend(_break_tie([name for name in names if values[name] == value], rows, matrix))
+            return ranked
+    return sorted(names)
@@ -2,7 +2,14 @@ import streamlit as st
 import sys
 sys.path.append("..")
 
+from config.cache import get_circuit_breaker, show_data_status, stale_while_revalidate, sync_ledger
 from config.supabase import get_supabase_client
+from config.divisions import (
+    division_generation, fetch_divisions, invalidate_division, select_division
+)
+from config.resources import get_ledger_replica
+from league.ratings import recompute_division
+from league.reconcile import format_discrepancy, reconcile_team_records
 
 st.set_page_config(page_title="Teams - Tamkeen Admin", page_icon="🏀", layout="wide")
 
@@ -41,23 +48,25 @@ except ValueError as e:
     connected = False
 
 if connected:
-    # Fetch existing teams
-    @st.cache_data(ttl=60)
-    def fetch_teams():
-        response = supabase.table("teams").select("*").order("name").execute()
+    division = select_division(supabase)
+
+    # Fetch the division's teams; generation changes when the division is written to
+    @stale_while_revalidate(ttl=60)
+    def fetch_teams(division, generation):
+        response = supabase.table("teams").select("*").eq("division_name", division).order("name").execute()
         return response.data
 
     # Add new team section
-    st.subheader("Add New Team")
+    st.subheader(f"Add New Team to {division}")
     with st.form("add_team_form"):
         new_team_name = st.text_input("Team Name")
         submitted = st.form_submit_button("Add Team", use_container_width=True)
 
         if submitted and new_team_name:
             try:
-                supabase.table("teams").insert({"name": new_team_name}).execute()
+                supabase.table("teams").insert({"name": new_team_name, "division_name": division}).execute()
                 st.success(f"Team '{new_team_name}' added successfully!")
-                st.cache_data.clear()
+                invalidate_division(division)
                 st.rerun()
             except Exception as e:
                 st.error(f"Error adding team: {e}")
@@ -67,7 +76,7 @@ if connected:
     # Display existing teams
     st.subheader("Existing Teams")
 
-    teams = fetch_teams()
+    teams = fetch_teams(division, division_generation(division))
 
     if teams:
         for team in teams:
@@ -85,7 +94,7 @@ if connected:
                         try:
                             supabase.table("teams").delete().eq("id", team['id']).execute()
                             st.success(f"Team '{team['name']}' deleted!")
-                            st.cache_data.clear()
+                            invalidate_division(division)
                             st.rerun()
                         except Exception as e:
                             st.error(f"Error deleting team: {e}")
@@ -94,14 +103,25 @@ if connected:
                 if st.session_state.get(f"editing_{team['id']}", False):
                     with st.form(f"edit_form_{team['id']}"):
                         new_name = st.text_input("New Team Name", value=team['name'])
+                        divisions = fetch_divisions(supabase)
+                        new_division = st.selectbox(
+                            "Division",
+                            options=divisions,
+                            index=divisions.index(division) if division in divisions else 0,
+                            help="Only teams without any games can move to another division."
+                        )
                         col_save, col_cancel = st.columns(2)
                         with col_save:
                             if st.form_submit_button("Save", use_container_width=True):
                                 try:
-                                    supabase.table("teams").update({"name": new_name}).eq("id", team['id']).execute()
+                                    supabase.table("teams").update({
+                                        "name": new_name,
+                                        "division_name": new_division
+                                    }).eq("id", team['id']).execute()
                                     st.success("Team updated!")
                                     st.session_state[f"editing_{team['id']}"] = False
-                                    st.cache_data.clear()
+                                    invalidate_division(division)
+                                    invalidate_division(new_division)
                                     st.rerun()
                                 except Exception as e:
                                     st.error(f"Error updating team: {e}")
@@ -112,6 +132,77 @@ if connected:
 
                 st.divider()
     else:
-        st.info("No teams found. Add your first team above!")
+        st.info(f"No teams found in {division}. Add your first team above!")
+
+    st.divider()
+
+    # Divisions are shared by every page; new ones appear in the sidebar
+    st.subheader("Divisions")
+    st.write(", ".join(fetch_divisions(supabase)))
+    with st.form("add_division_form"):
+        new_division_name = st.text_input("Division Name", placeholder="e.g., U12, U14")
+        if st.form_submit_button("Add Division", use_container_width=True) and new_division_name:
+            try:
+                supabase.table("divisions").insert({"name": new_division_name}).execute()
+                st.success(f"Division '{new_division_name}' added!")
+                fetch_divisions.clear()
+                st.rerun()
+            except Exception as e:
+                st.error(f"Error adding division: {e}")
+
+    st.divider()
+
+    # Compare stored W-L records with what the ledger says
+    st.subheader("Record Check")
+    st.write("Recompute every team's record from final games and the score ledger.")
+
+    check_col, repair_col = st.columns(2)
+    with check_col:
+        if st.button("Check Records", use_container_width=True):
+            try:
+                st.session_state["record_discrepancies"] = reconcile_team_records(supabase)
+            except Exception as e:
+                st.error(f"Error checking records: {e}")
+    with repair_col:
+        if st.button("Repair Records", use_container_width=True):
+            try:
+                repaired = reconcile_team_records(supabase, repair=True)
+                st.session_state["record_discrepancies"] = []
+                st.success(f"Repaired {len(repaired)} team record(s).")
+                # The check covers the whole league, so expire every division
+                for name in fetch_divisions(supabase):
+                    invalidate_division(name)
+            except Exception as e:
+                st.error(f"Error repairing records: {e}")
+
+    if "record_discrepancies" in st.session_state:
+        discrepancies = st.session_state["record_discrepancies"]
+        if discrepancies:
+            for row in discrepancies:
+                st.warning(format_discrepancy(row))
+        else:
+            st.success("All team records match the ledger.")
+
+    st.divider()
+
+    # End Game updates ratings one game at a time; replay the season after
+    # games are edited or deleted on the Schedule page
+    st.subheader("Power Ratings")
+    st.write(f"Recompute every {division} team's rating from its final games, in order.")
+    if st.button("Recompute Ratings", use_container_width=True):
+        ledger = get_ledger_replica(division)
+        error = sync_ledger(ledger)
+        if error:
+            st.error(f"Error syncing scores: {error}")
+        else:
+            try:
+                # Many reads and a write; fails at once while Supabase is down
+                ratings = get_circuit_breaker().call(recompute_division, supabase, division, ledger)
+                st.success(f"Recomputed ratings for {len(ratings)} team(s).")
+                invalidate_division(division)
+            except Exception as e:
+                st.error(f"Error recomputing ratings: {e}")
+
+    show_data_status()
 else:
     st.warning("Please configure your Supabase credentials to manage teams.")
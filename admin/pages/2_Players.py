@@ -1,8 +1,12 @@
 import streamlit as st
+import pandas as pd
 import sys
 sys.path.append("..")
 
+from config.cache import show_data_status, stale_while_revalidate
 from config.supabase import get_supabase_client
+from config.divisions import invalidate_division, league_generation
+from league.roster import ROSTER_FIELDS, apply_roster_changes, roster_changes, validate_roster
 
 st.set_page_config(page_title="Players - Tamkeen Admin", page_icon="🏀", layout="wide")
 
@@ -18,25 +22,33 @@ except ValueError as e:
     connected = False
 
 if connected:
+    # Rosters span every division, so fetches are cached per league
+    # generation, which changes when any division is written to
     # Fetch teams for dropdown
-    @st.cache_data(ttl=60)
-    def fetch_teams():
-        response = supabase.table("teams").select("name").order("name").execute()
+    @stale_while_revalidate(ttl=60)
+    def fetch_teams(generation):
+        response = supabase.table("teams").select("name,division_name").order("name").execute()
         return response.data
 
     # Fetch players
-    @st.cache_data(ttl=60)
-    def fetch_players():
+    @stale_while_revalidate(ttl=60)
+    def fetch_players(generation):
         response = supabase.table("players").select("*").order("name").execute()
         return response.data
 
-    teams = fetch_teams()
+    teams = fetch_teams(league_generation())
 
     if not teams:
         st.warning("No teams found. Please create teams first before adding players.")
     else:
         # Create team name list
         team_names = [team['name'] for team in teams]
+        team_divisions = {team['name']: team['division_name'] for team in teams}
+
+        def roster_saved(team_names_changed):
+            # Rosters are read by the Live Scorer of the teams' divisions only
+            for division in {team_divisions.get(name) for name in team_names_changed} - {None}:
+                invalidate_division(division)
 
         # Add new player section
         st.subheader("Add New Player")
@@ -60,7 +72,7 @@ if connected:
                         "jersey_number": jersey_number
                     }).execute()
                     st.success(f"Player '{player_name}' added to {selected_team}!")
-                    st.cache_data.clear()
+                    roster_saved([selected_team])
                     st.rerun()
                 except Exception as e:
                     if "unique" in str(e).lower():
@@ -78,85 +90,73 @@ if connected:
             key="filter_team"
         )
 
-        players = fetch_players()
+        players = fetch_players(league_generation())
 
         # Apply filter
         if filter_team != "All Teams":
-            players = [p for p in players if p['team_name'] == filter_team]
-
-        if players:
-            # Group by team for display
-            display_teams = team_names if filter_team == "All Teams" else [filter_team]
-
-            for team_name in display_teams:
-                team_players = [p for p in players if p['team_name'] == team_name]
-
-                if team_players:
-                    st.markdown(f"### {team_name}")
-
-                    for player in sorted(team_players, key=lambda x: x['jersey_number']):
-                        col1, col2, col3, col4 = st.columns([1, 3, 1, 1])
-
-                        with col1:
-                            st.markdown(f"**#{player['jersey_number']}**")
-                        with col2:
-                            st.write(player['name'])
-                        with col3:
-                            if st.button("Edit", key=f"edit_player_{player['id']}"):
-                                st.session_state[f"editing_player_{player['id']}"] = True
-                        with col4:
-                            if st.button("Delete", key=f"delete_player_{player['id']}"):
-                                try:
-                                    supabase.table("players").delete().eq("id", player['id']).execute()
-                                    st.success(f"Player '{player['name']}' removed!")
-                                    st.cache_data.clear()
-                                    st.rerun()
-                                except Exception as e:
-                                    st.error(f"Error removing player: {e}")
-
-                        # Edit form
-                        if st.session_state.get(f"editing_player_{player['id']}", False):
-                            with st.form(f"edit_player_form_{player['id']}"):
-                                edit_col1, edit_col2, edit_col3 = st.columns([2, 2, 1])
-                                with edit_col1:
-                                    new_name = st.text_input("Name", value=player['name'])
-                                with edit_col2:
-                                    current_team_idx = team_names.index(player['team_name']) if player['team_name'] in team_names else 0
-                                    new_team = st.selectbox(
-                                        "Team",
-                                        options=team_names,
-                                        index=current_team_idx
-                                    )
-                                with edit_col3:
-                                    new_jersey = st.number_input(
-                                        "Jersey #",
-                                        min_value=0,
-                                        max_value=99,
-                                        value=player['jersey_number']
-                                    )
-
-                                btn_col1, btn_col2 = st.columns(2)
-                                with btn_col1:
-                                    if st.form_submit_button("Save", use_container_width=True):
-                                        try:
-                                            supabase.table("players").update({
-                                                "name": new_name,
-                                                "team_name": new_team,
-                                                "jersey_number": new_jersey
-                                            }).eq("id", player['id']).execute()
-                                            st.success("Player updated!")
-                                            st.session_state[f"editing_player_{player['id']}"] = False
-                                            st.cache_data.clear()
-                                            st.rerun()
-                                        except Exception as e:
-                                            st.error(f"Error updating player: {e}")
-                                with btn_col2:
-                                    if st.form_submit_button("Cancel", use_container_width=True):
-                                        st.session_state[f"editing_player_{player['id']}"] = False
-                                        st.rerun()
-
-                    st.divider()
+            grid_players = [p for p in players if p['team_name'] == filter_team]
         else:
-            st.info("No players found. Add players using the form above!")
+            grid_players = players
+
+        st.write("Edit names, teams and jersey numbers in the grid. Add rows for new players, "
+                 "select rows and delete them to remove players, then save all changes at once.")
+
+        # Grid of the roster, grouped by team
+        grid_players = sorted(grid_players, key=lambda x: (x['team_name'], x['jersey_number']))
+        roster_df = pd.DataFrame(
+            [{field: p[field] for field in ("id",) + ROSTER_FIELDS} for p in grid_players],
+            columns=["id", *ROSTER_FIELDS],
+        )
+
+        edited_df = st.data_editor(
+            roster_df,
+            # Saving bumps roster_version so the grid starts fresh from the new data
+            key=f"roster_editor_{filter_team}_{st.session_state.get('roster_version', 0)}",
+            num_rows="dynamic",
+            hide_index=True,
+            use_container_width=True,
+            column_order=["jersey_number", "name", "team_name"],
+            column_config={
+                "jersey_number": st.column_config.NumberColumn("Jersey #", min_value=0, max_value=99, step=1, required=True),
+                "name": st.column_config.TextColumn("Name", required=True),
+                "team_name": st.column_config.SelectboxColumn(
+                    "Team",
+                    options=team_names,
+                    required=True,
+                    default=filter_team if filter_team != "All Teams" else None
+                ),
+            },
+        )
+
+        if st.button("Save Roster Changes", use_container_width=True, type="primary"):
+            edited_rows = edited_df.to_dict("records")
+            inserts, updates, deletes = roster_changes(grid_players, edited_rows)
+
+            if not (inserts or updates or deletes):
+                st.info("No changes to save.")
+            else:
+                # Check jersey numbers against the whole league before sending anything
+                errors = validate_roster(players, inserts, updates, deletes)
+                if errors:
+                    for error in errors:
+                        st.error(error)
+                else:
+                    try:
+                        apply_roster_changes(supabase, inserts, updates, deletes)
+                        st.success(
+                            f"Saved {len(inserts)} new, {len(updates)} updated and {len(deletes)} removed player(s)."
+                        )
+                        st.session_state['roster_version'] = st.session_state.get('roster_version', 0) + 1
+                        players_by_id = {p['id']: p for p in players}
+                        roster_saved(
+                            [row['team_name'] for row in inserts + updates]
+                            + [players_by_id[row['id']]['team_name'] for row in updates]
+                            + [players_by_id[player_id]['team_name'] for player_id in deletes]
+                        )
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"Error saving roster: {e}")
+
+    show_data_status()
 else:
     st.warning("Please configure your Supabase credentials to manage players.")
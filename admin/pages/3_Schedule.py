@@ -3,7 +3,9 @@ from datetime import datetime, time
 import sys
 sys.path.append("..")
 
+from config.cache import show_data_status, stale_while_revalidate
 from config.supabase import get_supabase_client
+from config.divisions import division_generation, invalidate_division, select_division
 
 st.set_page_config(page_title="Schedule - Tamkeen Admin", page_icon="🏀", layout="wide")
 
@@ -19,20 +21,29 @@ except ValueError as e:
     connected = False
 
 if connected:
-    @st.cache_data(ttl=60)
-    def fetch_teams():
-        response = supabase.table("teams").select("name").order("name").execute()
+    division = select_division(supabase)
+
+    # Cached per division; generation changes when the division is written to
+    @stale_while_revalidate(ttl=60)
+    def fetch_teams(division, generation):
+        response = supabase.table("teams").select("name").eq("division_name", division).order("name").execute()
         return response.data
 
-    @st.cache_data(ttl=60)
-    def fetch_games():
-        response = supabase.table("games").select("*").order("start_time", desc=True).execute()
+    @stale_while_revalidate(ttl=60)
+    def fetch_games(division, generation):
+        response = (
+            supabase.table("games").select("*")
+            .eq("division_name", division)
+            .order("start_time", desc=True)
+            .execute()
+        )
         return response.data
 
-    teams = fetch_teams()
+    generation = division_generation(division)
+    teams = fetch_teams(division, generation)
 
     if len(teams) < 2:
-        st.warning("You need at least 2 teams to create a game. Please add more teams first.")
+        st.warning(f"You need at least 2 teams in {division} to create a game. Please add more teams first.")
     else:
         team_names = [team['name'] for team in teams]
 
@@ -83,7 +94,7 @@ if connected:
                             "status": "scheduled"
                         }).execute()
                         st.success(f"Game scheduled: {home_team} vs {away_team}")
-                        st.cache_data.clear()
+                        invalidate_division(division)
                         st.rerun()
                     except Exception as e:
                         st.error(f"Error creating game: {e}")
@@ -100,7 +111,7 @@ if connected:
             key="status_filter"
         )
 
-        games = fetch_games()
+        games = fetch_games(division, generation)
 
         # Apply filter
         if status_filter != "All":
@@ -193,7 +204,7 @@ if connected:
                                     }).eq("id", game['id']).execute()
                                     st.success("Game updated!")
                                     st.session_state[f"editing_game_{game['id']}"] = False
-                                    st.cache_data.clear()
+                                    invalidate_division(division)
                                     st.rerun()
                                 except Exception as e:
                                     st.error(f"Error updating game: {e}")
@@ -203,7 +214,7 @@ if connected:
                                     supabase.table("games").delete().eq("id", game['id']).execute()
                                     st.success("Game deleted!")
                                     st.session_state[f"editing_game_{game['id']}"] = False
-                                    st.cache_data.clear()
+                                    invalidate_division(division)
                                     st.rerun()
                                 except Exception as e:
                                     st.error(f"Error deleting game: {e}")
@@ -215,5 +226,7 @@ if connected:
                 st.divider()
         else:
             st.info("No games found. Create your first game above!")
+
+    show_data_status()
 else:
     st.warning("Please configure your Supabase credentials to manage the schedule.")
@@ -1,9 +1,16 @@
 import streamlit as st
+import pandas as pd
 from datetime import datetime
 import sys
 sys.path.append("..")
 
+from config.cache import get_circuit_breaker, show_data_status, stale_notice, stale_while_revalidate, sync_ledger
 from config.supabase import get_supabase_client
+from config.divisions import division_generation, invalidate_division, select_division
+from config.resources import get_ledger_replica, get_matchup_matrix
+from league.fast_entry import jersey_index, read_plays
+from league.leaderboard import box_score
+from league.ratings import recompute_division
 
 st.set_page_config(page_title="Live Scorer - Tamkeen Admin", page_icon="🏀", layout="wide")
 
@@ -19,33 +26,151 @@ except ValueError as e:
     connected = False
 
 if connected:
-    @st.cache_data(ttl=30)
-    def fetch_live_games():
-        response = supabase.table("games").select("*").eq("status", "live").execute()
+    division = select_division(supabase)
+
+    # Cached per division; generation changes when the division is written to
+    @stale_while_revalidate(ttl=30)
+    def fetch_live_games(division, generation):
+        response = supabase.table("games").select("*").eq("division_name", division).eq("status", "live").execute()
         return response.data
 
-    @st.cache_data(ttl=30)
-    def fetch_scheduled_games():
-        response = supabase.table("games").select("*").eq("status", "scheduled").order("start_time").execute()
+    @stale_while_revalidate(ttl=30)
+    def fetch_scheduled_games(division, generation):
+        response = (
+            supabase.table("games").select("*")
+            .eq("division_name", division).eq("status", "scheduled")
+            .order("start_time")
+            .execute()
+        )
         return response.data
 
-    def fetch_players_for_team(team_name):
+    @stale_while_revalidate(ttl=60)
+    def fetch_players_for_team(team_name, generation):
         response = supabase.table("players").select("*").eq("team_name", team_name).order("jersey_number").execute()
         return response.data
 
-    def fetch_game_score(game_id, team_name):
-        response = supabase.table("score_logs").select("points").eq("game_id", game_id).eq("team_name", team_name).execute()
-        return sum(log['points'] for log in response.data) if response.data else 0
+    # Built once per game and roster version, so fast entry resolves a
+    # play with one lookup instead of scanning the rosters
+    @st.cache_data(ttl=60)
+    def fetch_jersey_index(home_team_name, away_team_name, generation):
+        return jersey_index(
+            home_team_name, fetch_players_for_team(home_team_name, generation),
+            away_team_name, fetch_players_for_team(away_team_name, generation),
+        )
 
-    def fetch_recent_scores(game_id, limit=10):
-        response = supabase.table("score_logs").select("*").eq("game_id", game_id).order("created_at", desc=True).limit(limit).execute()
-        return response.data
+    # Scores are read from the division's local ledger replica
+    ledger = get_ledger_replica(division)
 
-    live_games = fetch_live_games()
-    scheduled_games = fetch_scheduled_games()
+    def fetch_game_score(game_id, team_name):
+        return ledger.team_score(game_id, team_name)
 
-    # Start a game section
-    if scheduled_games:
+    def fetch_recent_scores(game_id, limit=10):
+        return ledger.recent(game_id, limit)
+
+    # ==========================================
+    # FRAGMENTS
+    # The scoreboard, recent scores and box score are fragments. Score and
+    # Undo buttons write from a callback and then rerun only those
+    # fragments, so the player grid is not rebuilt on every basket.
+    # ==========================================
+    LEDGER_FRAGMENTS = ["scoreboard", "recent_scores", "box_score"]
+
+    # Writes go through the circuit breaker too, so while Supabase is down
+    # a tap fails at once instead of waiting for a timeout
+    breaker = get_circuit_breaker()
+
+    def log_score(game_id, team_name, player_name, points):
+        try:
+            breaker.call(supabase.table("score_logs").insert({
+                "game_id": game_id,
+                "player_name": player_name,
+                "team_name": team_name,
+                "points": points
+            }).execute)
+            st.toast(f"+{points} for {player_name}!")
+        except Exception as e:
+            st.toast(f"Error logging score: {e}")
+        st.rerun(LEDGER_FRAGMENTS)
+
+    def undo_score(score_id):
+        try:
+            breaker.call(supabase.table("score_logs").delete().eq("id", score_id).execute)
+            st.toast("Score removed!")
+        except Exception as e:
+            st.toast(f"Error removing score: {e}")
+        st.rerun(LEDGER_FRAGMENTS)
+
+    # ==========================================
+    # FAST ENTRY
+    # Plays typed as H23+2 / A5+3 (or 123+2 on a keypad) go into a queue
+    # that is logged with one insert, either on every Enter or when the
+    # scorer chooses, so several plays can be typed without waiting.
+    # ==========================================
+    def fast_entry_queue(game_id):
+        return st.session_state.setdefault(f"fast_entry_queue_{game_id}", [])
+
+    def log_queued_plays(game_id):
+        queue = fast_entry_queue(game_id)
+        if queue:
+            try:
+                # One request; rows keep the order they were typed in (ascending ids)
+                breaker.call(supabase.table("score_logs").insert([
+                    {"game_id": game_id, "player_name": player_name, "team_name": team_name, "points": points}
+                    for team_name, player_name, points in queue
+                ]).execute)
+                st.toast(f"Logged {len(queue)} play(s)!")
+                queue.clear()
+            except Exception as e:
+                # Kept in the queue to retry
+                st.toast(f"Error logging plays: {e}")
+        st.rerun(LEDGER_FRAGMENTS + ["fast_entry"])
+
+    def enter_plays(game_id, index):
+        plays, errors = read_plays(st.session_state["fast_entry_input"], index)
+        st.session_state["fast_entry_errors"] = errors
+        if errors:
+            # Nothing is queued and the input is kept so it can be fixed
+            st.rerun(["fast_entry"])
+
+        st.session_state["fast_entry_input"] = ""
+        fast_entry_queue(game_id).extend(plays)
+        if st.session_state["fast_entry_auto"]:
+            log_queued_plays(game_id)
+        st.rerun(["fast_entry"])
+
+    def clear_queue(game_id):
+        fast_entry_queue(game_id).clear()
+        st.rerun(["fast_entry"])
+
+    @st.fragment(key="fast_entry")
+    def fast_entry(game_id, index):
+        input_col, auto_col = st.columns([3, 1])
+        with input_col:
+            st.text_input(
+                "Play",
+                key="fast_entry_input",
+                placeholder="H23+2  A5+3  (keypad: 123+2, 25+3)",
+                on_change=enter_plays,
+                args=(game_id, index),
+            )
+        with auto_col:
+            st.toggle("Log on Enter", key="fast_entry_auto", value=True)
+
+        for error in st.session_state.get("fast_entry_errors", []):
+            st.error(error)
+
+        queue = fast_entry_queue(game_id)
+        if queue:
+            st.write("Queued: " + ", ".join(f"**{player_name}** +{points}" for _, player_name, points in queue))
+            log_col, clear_col = st.columns(2)
+            with log_col:
+                st.button(f"Log {len(queue)} Queued Play(s)", use_container_width=True, type="primary",
+                          on_click=log_queued_plays, args=(game_id,))
+            with clear_col:
+                st.button("Clear Queue", use_container_width=True, on_click=clear_queue, args=(game_id,))
+
+    @st.fragment
+    def start_game_section(scheduled_games):
         st.subheader("Start a Game")
         game_options = {}
         for game in scheduled_games:
@@ -59,13 +184,74 @@ if connected:
 
         if st.button("Start Game", use_container_width=True):
             try:
-                supabase.table("games").update({"status": "live"}).eq("id", game_options[selected_game]).execute()
+                breaker.call(supabase.table("games").update({"status": "live"}).eq("id", game_options[selected_game]).execute)
                 st.success("Game started!")
-                st.cache_data.clear()
+                invalidate_division(division)
                 st.rerun()
             except Exception as e:
                 st.error(f"Error starting game: {e}")
 
+    @st.fragment(key="scoreboard")
+    def scoreboard(game_id, home_team_name, away_team_name):
+        # On failure the scores are the replica's as of its last sync
+        sync_error = sync_ledger(ledger)
+        home_score = fetch_game_score(game_id, home_team_name)
+        away_score = fetch_game_score(game_id, away_team_name)
+
+        score_col1, score_col2, score_col3 = st.columns([2, 1, 2])
+
+        with score_col1:
+            st.markdown(f"<h2 style='text-align: center;'>{home_team_name}</h2>", unsafe_allow_html=True)
+            st.markdown(f"<h1 style='text-align: center; color: #8B0000;'>{home_score}</h1>", unsafe_allow_html=True)
+
+        with score_col2:
+            st.markdown("<h2 style='text-align: center;'>VS</h2>", unsafe_allow_html=True)
+
+        with score_col3:
+            st.markdown(f"<h2 style='text-align: center;'>{away_team_name}</h2>", unsafe_allow_html=True)
+            st.markdown(f"<h1 style='text-align: center; color: #8B0000;'>{away_score}</h1>", unsafe_allow_html=True)
+
+        if sync_error:
+            st.warning(stale_notice("Scores", ledger.synced_at))
+
+    @st.fragment(key="recent_scores")
+    def recent_scores_list(game_id):
+        # Runs after the scoreboard, which has already synced the ledger
+        recent_scores = fetch_recent_scores(game_id)
+
+        if recent_scores:
+            for score in recent_scores:
+                col1, col2, col3 = st.columns([3, 1, 1])
+
+                player_name = score.get('player_name', 'Unknown')
+                team_name_display = score.get('team_name', 'Unknown')
+                timestamp = datetime.fromisoformat(score['created_at'].replace('Z', '+00:00'))
+
+                with col1:
+                    st.write(f"**{player_name}** ({team_name_display}) - +{score['points']} pts")
+                with col2:
+                    st.write(timestamp.strftime("%I:%M:%S %p"))
+                with col3:
+                    st.button("Undo", key=f"undo_{score['id']}", on_click=undo_score, args=(score['id'],))
+        else:
+            st.info("No scores logged yet for this game.")
+
+    @st.fragment(key="box_score")
+    def box_score_table(game_id):
+        # Runs after the scoreboard, which has already synced the ledger
+        box = box_score(ledger.columnar(), game_id)
+        if box:
+            st.dataframe(pd.DataFrame(box), use_container_width=True, hide_index=True)
+        else:
+            st.info("No scores logged yet for this game.")
+
+    generation = division_generation(division)
+    live_games = fetch_live_games(division, generation)
+    scheduled_games = fetch_scheduled_games(division, generation)
+
+    # Start a game section
+    if scheduled_games:
+        start_game_section(scheduled_games)
         st.divider()
 
     # Live scoring section
@@ -87,35 +273,22 @@ if connected:
         away_team_name = current_game['away_team_name']
         game_id = current_game['id']
 
-        # Fetch current scores
-        home_score = fetch_game_score(game_id, home_team_name)
-        away_score = fetch_game_score(game_id, away_team_name)
-
         # Scoreboard display
         st.markdown("### Scoreboard")
-        score_col1, score_col2, score_col3 = st.columns([2, 1, 2])
-
-        with score_col1:
-            st.markdown(f"<h2 style='text-align: center;'>{home_team_name}</h2>", unsafe_allow_html=True)
-            st.markdown(f"<h1 style='text-align: center; color: #8B0000;'>{home_score}</h1>", unsafe_allow_html=True)
-
-        with score_col2:
-            st.markdown("<h2 style='text-align: center;'>VS</h2>", unsafe_allow_html=True)
-
-        with score_col3:
-            st.markdown(f"<h2 style='text-align: center;'>{away_team_name}</h2>", unsafe_allow_html=True)
-            st.markdown(f"<h1 style='text-align: center; color: #8B0000;'>{away_score}</h1>", unsafe_allow_html=True)
+        scoreboard(game_id, home_team_name, away_team_name)
 
         st.divider()
 
         # Scoring buttons for each team
         st.markdown("### Log Score")
 
+        fast_entry(game_id, fetch_jersey_index(home_team_name, away_team_name, generation))
+
         tab1, tab2 = st.tabs([f"🏠 {home_team_name}", f"✈️ {away_team_name}"])
 
         for tab, team_name in [(tab1, home_team_name), (tab2, away_team_name)]:
             with tab:
-                players = fetch_players_for_team(team_name)
+                players = fetch_players_for_team(team_name, generation)
 
                 if players:
                     # Create a grid of player buttons
@@ -129,23 +302,13 @@ if connected:
 
                         for col, points in [(col2, 1), (col3, 2), (col4, 3)]:
                             with col:
-                                if st.button(
+                                st.button(
                                     f"+{points}",
                                     key=f"score_{team_name}_{player['id']}_{points}",
-                                    use_container_width=True
-                                ):
-                                    try:
-                                        supabase.table("score_logs").insert({
-                                            "game_id": game_id,
-                                            "player_name": player['name'],
-                                            "team_name": team_name,
-                                            "points": points
-                                        }).execute()
-                                        st.success(f"+{points} for {player['name']}!")
-                                        st.cache_data.clear()
-                                        st.rerun()
-                                    except Exception as e:
-                                        st.error(f"Error logging score: {e}")
+                                    use_container_width=True,
+                                    on_click=log_score,
+                                    args=(game_id, team_name, player['name'], points)
+                                )
                 else:
                     st.warning(f"No players found for {team_name}. Add players first.")
 
@@ -153,31 +316,12 @@ if connected:
 
         # Recent scores and undo
         st.markdown("### Recent Scores")
-        recent_scores = fetch_recent_scores(game_id)
+        recent_scores_list(game_id)
 
-        if recent_scores:
-            for score in recent_scores:
-                col1, col2, col3 = st.columns([3, 1, 1])
-
-                player_name = score.get('player_name', 'Unknown')
-                team_name_display = score.get('team_name', 'Unknown')
-                timestamp = datetime.fromisoformat(score['created_at'].replace('Z', '+00:00'))
+        st.divider()
 
-                with col1:
-                    st.write(f"**{player_name}** ({team_name_display}) - +{score['points']} pts")
-                with col2:
-                    st.write(timestamp.strftime("%I:%M:%S %p"))
-                with col3:
-                    if st.button("Undo", key=f"undo_{score['id']}"):
-                        try:
-                            supabase.table("score_logs").delete().eq("id", score['id']).execute()
-                            st.success("Score removed!")
-                            st.cache_data.clear()
-                            st.rerun()
-                        except Exception as e:
-                            st.error(f"Error removing score: {e}")
-        else:
-            st.info("No scores logged yet for this game.")
+        with st.expander("Box Score"):
+            box_score_table(game_id)
 
         st.divider()
 
@@ -188,36 +332,48 @@ if connected:
         with col1:
             if st.button("End Game (Mark as Final)", use_container_width=True, type="primary"):
                 try:
-                    # Update game status
-                    supabase.table("games").update({"status": "final"}).eq("id", game_id).execute()
-
-                    # Update team records by name
-                    if home_score > away_score:
-                        home_data = supabase.table("teams").select("wins").eq("name", home_team_name).execute().data[0]
-                        away_data = supabase.table("teams").select("losses").eq("name", away_team_name).execute().data[0]
-                        supabase.table("teams").update({"wins": home_data['wins'] + 1}).eq("name", home_team_name).execute()
-                        supabase.table("teams").update({"losses": away_data['losses'] + 1}).eq("name", away_team_name).execute()
-                    elif away_score > home_score:
-                        away_data = supabase.table("teams").select("wins").eq("name", away_team_name).execute().data[0]
-                        home_data = supabase.table("teams").select("losses").eq("name", home_team_name).execute().data[0]
-                        supabase.table("teams").update({"wins": away_data['wins'] + 1}).eq("name", away_team_name).execute()
-                        supabase.table("teams").update({"losses": home_data['losses'] + 1}).eq("name", home_team_name).execute()
-                    # Tie: no record changes
-
-                    st.success("Game ended!")
-                    st.cache_data.clear()
-                    st.rerun()
+                    # One transaction marks the game final and updates both
+                    # teams' records and ratings, from the scores in the
+                    # database; ending a game twice changes nothing
+                    result = breaker.call(supabase.rpc("end_game", {"target_game_id": game_id}).execute).data[0]
                 except Exception as e:
                     st.error(f"Error ending game: {e}")
+                else:
+                    # Keep the head-to-head matrix current for Rankings
+                    get_matchup_matrix(division).add_game(
+                        game_id, home_team_name, away_team_name, result['home_pts'], result['away_pts']
+                    )
+                    invalidate_division(division)
+
+                    ratings_error = None
+                    if result['needs_recompute']:
+                        # Ended out of schedule order: replay the season
+                        ratings_error = sync_ledger(ledger)
+                        if not ratings_error:
+                            try:
+                                breaker.call(recompute_division, supabase, division, ledger)
+                            except Exception as e:
+                                ratings_error = str(e)
+
+                    if ratings_error:
+                        st.warning(
+                            f"Game ended, but ratings could not be updated ({ratings_error}). "
+                            "Use Recompute Ratings on the Teams page."
+                        )
+                    else:
+                        st.success("Game ended!")
+                        st.rerun()
 
         with col2:
             if st.button("Refresh Scores", use_container_width=True):
-                st.cache_data.clear()
+                invalidate_division(division)
                 st.rerun()
 
     elif not scheduled_games:
-        st.info("No games available. Create games in the Schedule page first.")
+        st.info(f"No games available in {division}. Create games in the Schedule page first.")
     else:
-        st.info("No live games at the moment. Start a game from the options above.")
+        st.info(f"No live games in {division} at the moment. Start a game from the options above.")
+
+    show_data_status()
 else:
     st.warning("Please configure your Supabase credentials to use the live scorer.")
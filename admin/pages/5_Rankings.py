@@ -1,9 +1,23 @@
 import streamlit as st
 import pandas as pd
+import os
 import sys
+import tempfile
 sys.path.append("..")
 
+from config.cache import show_data_status, stale_while_revalidate, sync_ledger
 from config.supabase import get_supabase_client
+from config.divisions import division_generation, invalidate_division, select_division
+from config.resources import get_ledger_replica, get_matchup_matrix
+from league.export import DATASETS, FORMATS, date_range_bounds, export, export_file_name
+from league.leaderboard import CATEGORIES, CATEGORY_BY_NAME, leaderboards
+from league.projections import DEFAULT_SIMULATIONS, build_season, playoff_table, project, season_fingerprint
+from league.standings import game_results, rank_teams
+
+SIMULATION_CHOICES = [5_000, 20_000, 50_000, 100_000]
+
+# Processes to spread larger simulation runs over; 1 runs them in the page
+PROJECTION_WORKERS = int(os.getenv("PROJECTION_WORKERS", "1"))
 
 st.set_page_config(page_title="Rankings - Tamkeen Admin", page_icon="🏀", layout="wide")
 
@@ -20,72 +34,72 @@ except ValueError as e:
     connected = False
 
 if connected:
-    @st.cache_data(ttl=60)
-    def fetch_teams():
-        response = supabase.table("teams").select("*").execute()
+    division = select_division(supabase)
+
+    # Cached per division; generation changes when the division is written to
+    @stale_while_revalidate(ttl=60)
+    def fetch_teams(division, generation):
+        response = supabase.table("teams").select("*").eq("division_name", division).execute()
         return response.data
 
-    @st.cache_data(ttl=60)
+    # Ledger reads go through the division's local replica, which only
+    # downloads rows added or deleted since the last sync, and aggregate
+    # over its compact columnar copy
+    ledger = get_ledger_replica(division)
+
     def fetch_score_logs():
-        response = supabase.table("score_logs").select("*").execute()
+        # Last synced rows if Supabase can't be reached
+        sync_ledger(ledger)
+        return ledger.columnar()
+
+    @stale_while_revalidate(ttl=60)
+    def fetch_games(division, generation):
+        response = (
+            supabase.table("games").select("*")
+            .eq("division_name", division).eq("status", "final")
+            .execute()
+        )
         return response.data
 
-    @st.cache_data(ttl=60)
-    def fetch_games():
-        response = supabase.table("games").select("*").eq("status", "final").execute()
+    # Scheduled and live games, still to be decided
+    @stale_while_revalidate(ttl=60)
+    def fetch_remaining_games(division, generation):
+        response = (
+            supabase.table("games").select("*")
+            .eq("division_name", division).neq("status", "final")
+            .execute()
+        )
         return response.data
 
-    teams = fetch_teams()
+    # Keyed by the fingerprint of the results and schedule, so the
+    # simulation only reruns once a game is finalized or corrected
+    @st.cache_data(max_entries=32, show_spinner="Simulating the rest of the season...")
+    def fetch_playoff_odds(fingerprint, team_names, simulations, _results, _remaining_games):
+        season = build_season(team_names, _results, _remaining_games)
+        return project(season, simulations, workers=PROJECTION_WORKERS)
+
+    generation = division_generation(division)
+    teams = fetch_teams(division, generation)
     score_logs = fetch_score_logs()
-    games = fetch_games()
+    games = fetch_games(division, generation)
 
     # ==========================================
     # TEAM STANDINGS
     # ==========================================
-    st.subheader("Team Standings")
+    st.subheader(f"Team Standings: {division}")
 
     if teams:
-        # Calculate Points For (PF) and Points Against (PA) for each team
-        team_stats = {}
-        for team in teams:
-            team_name = team['name']
-            team_stats[team_name] = {
-                'Team': team_name,
-                'W': team['wins'],
-                'L': team['losses'],
-                'PF': 0,
-                'PA': 0,
-            }
-
-        # Calculate PF from score_logs
-        for log in score_logs:
-            team_name = log['team_name']
-            if team_name in team_stats:
-                team_stats[team_name]['PF'] += log['points']
-
-        # Calculate PA (points scored against each team in their games)
-        for game in games:
-            home_team = game['home_team_name']
-            away_team = game['away_team_name']
-            game_id = game['id']
-
-            # Get scores for this game
-            home_pts = sum(log['points'] for log in score_logs if log['game_id'] == game_id and log['team_name'] == home_team)
-            away_pts = sum(log['points'] for log in score_logs if log['game_id'] == game_id and log['team_name'] == away_team)
-
-            # Home team's PA is away team's score
-            if home_team in team_stats:
-                team_stats[home_team]['PA'] += away_pts
-            # Away team's PA is home team's score
-            if away_team in team_stats:
-                team_stats[away_team]['PA'] += home_pts
-
-        # Sort teams by wins (desc), then point differential (desc)
-        sorted_teams = sorted(
-            team_stats.values(),
-            key=lambda x: (x['W'], x['PF'] - x['PA']),
-            reverse=True
-        )
+        # Bring the head-to-head matrix up to date with the final games;
+        # only games that are new or changed since the last run are applied
+        matrix = get_matchup_matrix(division)
+        results = game_results(games, score_logs.game_totals())
+        matrix.sync(results)
+
+        # Sort by wins, then head-to-head, overall differential and PF
+        sorted_teams = rank_teams(teams, matrix)
+
+        # Power ratings are stored with the teams, updated at End Game
+        ratings = {team['name']: team['rating'] for team in teams}
 
         # Add rank and diff
         standings_data = []
@@ -97,77 +111,130 @@ if connected:
                 'Record': f"{team['W']}-{team['L']}",
                 'PF': team['PF'],
                 'PA': team['PA'],
-                'Diff': f"+{diff}" if diff > 0 else str(diff)
+                'Diff': f"+{diff}" if diff > 0 else str(diff),
+                'Rating': round(ratings[team['Team']])
             })
 
         df_standings = pd.DataFrame(standings_data)
         st.dataframe(df_standings, use_container_width=True, hide_index=True)
 
+        # ==========================================
+        # PLAYOFF ODDS
+        # ==========================================
+        st.markdown("#### Playoff Odds")
+        remaining_games = fetch_remaining_games(division, generation)
+
+        if remaining_games:
+            col1, col2 = st.columns(2)
+            with col1:
+                playoff_spots = st.number_input(
+                    "Playoff spots", min_value=1, max_value=len(teams), value=min(4, len(teams))
+                )
+            with col2:
+                simulations = st.selectbox(
+                    "Simulations", SIMULATION_CHOICES, index=SIMULATION_CHOICES.index(DEFAULT_SIMULATIONS),
+                    format_func=lambda n: f"{n:,}"
+                )
+
+            projection = fetch_playoff_odds(
+                season_fingerprint(results, remaining_games),
+                tuple(sorted(team['name'] for team in teams)), simulations,
+                results, remaining_games
+            )
+            records = {name: matrix.record(name) for name in projection['teams']}
+            df_odds = pd.DataFrame(playoff_table(projection, records, playoff_spots))
+            st.dataframe(df_odds, use_container_width=True, hide_index=True)
+            st.caption(
+                f"{simulations:,} simulations of the {projection['remaining_games']} remaining game(s), "
+                "from each team's scoring and defence so far. Ties are broken as in the standings."
+            )
+        else:
+            st.info("No games left to play; the standings above are final.")
+
     else:
-        st.info("No teams found. Add teams to see standings.")
+        st.info(f"No teams found in {division}. Add teams to see standings.")
 
     st.divider()
 
     # ==========================================
     # PLAYER LEADERBOARD
     # ==========================================
-    st.subheader("Player Leaderboard - Top Scorers")
-
-    if score_logs:
-        # Aggregate player stats
-        player_stats = {}
-        for log in score_logs:
-            player_name = log['player_name']
-            team_name = log['team_name']
-            key = f"{player_name}|{team_name}"
-
-            if key not in player_stats:
-                player_stats[key] = {
-                    'Player': player_name,
-                    'Team': team_name,
-                    'PTS': 0,
-                    'games': set()
-                }
-
-            player_stats[key]['PTS'] += log['points']
-            player_stats[key]['games'].add(log['game_id'])
-
-        # Calculate PPG and sort by total points
-        for key in player_stats:
-            games_played = len(player_stats[key]['games'])
-            player_stats[key]['GP'] = games_played
-            player_stats[key]['PPG'] = round(player_stats[key]['PTS'] / games_played, 1) if games_played > 0 else 0
-
-        sorted_players = sorted(
-            player_stats.values(),
-            key=lambda x: x['PTS'],
-            reverse=True
-        )[:15]  # Top 15 scorers
-
-        # Build leaderboard data
-        leaderboard_data = []
-        for rank, player in enumerate(sorted_players, 1):
-            leaderboard_data.append({
-                'Rank': rank,
-                'Player': player['Player'],
-                'Team': player['Team'],
-                'GP': player['GP'],
-                'PTS': player['PTS'],
-                'PPG': player['PPG']
-            })
+    st.subheader("Player Leaderboards")
+
+    if len(score_logs):
+        min_ppg_games = st.number_input(
+            "Minimum games for Points Per Game",
+            min_value=0,
+            value=CATEGORY_BY_NAME["Points Per Game"].min_games,
+        )
 
-        df_leaderboard = pd.DataFrame(leaderboard_data)
-        st.dataframe(df_leaderboard, use_container_width=True, hide_index=True)
+        # All categories come from one pass over the ledger; each keeps
+        # only its top 15 players
+        boards = leaderboards(score_logs, k=15, min_games={"Points Per Game": min_ppg_games})
+
+        tabs = st.tabs([category.name for category in CATEGORIES])
+        for tab, category in zip(tabs, CATEGORIES):
+            with tab:
+                if boards[category.name]:
+                    df_leaderboard = pd.DataFrame(boards[category.name])
+                    st.dataframe(df_leaderboard, use_container_width=True, hide_index=True)
+                else:
+                    st.info("No players qualify for this category yet.")
 
     else:
         st.info("No scoring data yet. Play some games to see the leaderboard.")
 
     st.divider()
 
+    # ==========================================
+    # EXPORT
+    # Generated only when Download is clicked, streamed page by page into a
+    # temporary file (gzipped by default), so only the finished file is
+    # held in memory. For multi-season exports use the command line:
+    # python -m league.export (from admin/), which streams straight to disk.
+    # ==========================================
+    EXPORT_MIME_TYPES = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+
+    @st.fragment
+    def export_section():
+        st.subheader("Export")
+
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            dataset = st.selectbox(
+                "Data", options=list(DATASETS), format_func=lambda name: name.replace("_", " ").title()
+            )
+        with col2:
+            start = st.date_input("First game date", value=None)
+        with col3:
+            end = st.date_input("Last game date", value=None)
+        with col4:
+            fmt = st.selectbox("Format", options=FORMATS, format_func=lambda name: "JSON Lines" if name == "jsonl" else "CSV")
+            compress = st.checkbox("Gzip", value=True)
+
+        def build_export():
+            out = tempfile.TemporaryFile()
+            export(supabase, dataset, out, fmt, compress, division, *date_range_bounds(start, end))
+            out.seek(0)
+            return out
+
+        st.download_button(
+            "Download",
+            data=build_export,
+            file_name=export_file_name(dataset, fmt, compress, division, start, end),
+            mime="application/gzip" if compress else EXPORT_MIME_TYPES[fmt],
+            use_container_width=True,
+        )
+
+    export_section()
+
+    st.divider()
+
     # Refresh button
     if st.button("Refresh Rankings", use_container_width=True):
-        st.cache_data.clear()
+        invalidate_division(division)
         st.rerun()
 
+    show_data_status()
 else:
     st.warning("Please configure your Supabase credentials to view rankings.")
@@ -0,0 +1,250 @@
+import streamlit as st
+import pandas as pd
+from datetime import datetime
+import sys
+sys.path.append("..")
+
+from config.cache import get_circuit_breaker, show_data_status, stale_while_revalidate, sync_ledger
+from config.supabase import get_supabase_client
+from config.divisions import division_generation, invalidate_division, select_division
+from config.resources import get_ledger_replica, get_matchup_matrix
+from league.ratings import recompute_division
+
+st.set_page_config(page_title="Play-by-Play - Tamkeen Admin", page_icon="🏀", layout="wide")
+
+st.title("Play-by-Play")
+st.divider()
+
+# Ledger entries shown per page
+PAGE_SIZE = 25
+
+# Initialize Supabase client
+try:
+    supabase = get_supabase_client()
+    connected = True
+except ValueError as e:
+    st.error(str(e))
+    connected = False
+
+if connected:
+    division = select_division(supabase)
+
+    # Cached per division; generation changes when the division is written to
+    @stale_while_revalidate(ttl=30)
+    def fetch_games(division, generation):
+        response = (
+            supabase.table("games").select("*")
+            .eq("division_name", division).neq("status", "scheduled")
+            .order("start_time", desc=True)
+            .execute()
+        )
+        return response.data
+
+    @stale_while_revalidate(ttl=60)
+    def fetch_players_for_team(team_name, generation):
+        response = supabase.table("players").select("*").eq("team_name", team_name).order("jersey_number").execute()
+        return response.data
+
+    # Pages are read from the division's local ledger replica
+    ledger = get_ledger_replica(division)
+
+    def game_scores(game):
+        return ledger.team_score(game['id'], game['home_team_name']), ledger.team_score(game['id'], game['away_team_name'])
+
+    # ==========================================
+    # PAGING
+    # Keyset pagination on (created_at, id): each page starts below the last
+    # row of the page before it, so deep pages cost the same as the first
+    # and corrections never shift rows between pages. The page shown is
+    # kept in session state, so a table selection always refers to the
+    # rows on screen even if baskets are logged meanwhile.
+    # ==========================================
+    def page_state(game_id):
+        return st.session_state.setdefault(
+            f"play_by_play_{game_id}", {"cursors": [None], "rows": None, "has_more": False, "version": 0}
+        )
+
+    def load_page(game_id, state):
+        sync_ledger(ledger)
+        rows = ledger.play_by_play(game_id, state["cursors"][-1], PAGE_SIZE + 1)
+        state["rows"], state["has_more"] = rows[:PAGE_SIZE], len(rows) > PAGE_SIZE
+        # A new table widget, so no selection outlives the rows it was made on
+        state["version"] += 1
+
+    def newer_page(game_id, state):
+        state["cursors"].pop()
+        load_page(game_id, state)
+
+    def older_page(game_id, state):
+        last = state["rows"][-1]
+        state["cursors"].append((last['created_at'], last['id']))
+        load_page(game_id, state)
+
+    # ==========================================
+    # CORRECTIONS
+    # Each is one request however many entries are selected, and when it
+    # changes a final game's result the database updates both teams'
+    # records in the same transaction. Only the corrected game's derived
+    # totals are refreshed: the ledger replica syncs the change and, for a
+    # final game, its head-to-head result is replaced in the matchup matrix
+    # and the division's power ratings are replayed. Division caches are
+    # only expired when a final game's scores change.
+    # Writes go through the circuit breaker, so they fail at once while
+    # Supabase is down.
+    # ==========================================
+    breaker = get_circuit_breaker()
+
+    def corrected(game, state, scores_before):
+        load_page(game['id'], state)
+        if game['status'] != "final":
+            return
+
+        home_score, away_score = game_scores(game)
+        get_matchup_matrix(division).add_game(
+            game['id'], game['home_team_name'], game['away_team_name'], home_score, away_score
+        )
+        home_before, away_before = scores_before
+        if (home_score, away_score) != scores_before:
+            invalidate_division(division)
+            # Ratings depend on every later game, so replay the season
+            try:
+                breaker.call(recompute_division, supabase, division, ledger)
+            except Exception as e:
+                st.toast(f"Error updating ratings: {e}")
+        # Compare win / loss / tie, not the scores
+        if (home_before > away_before) - (home_before < away_before) != (home_score > away_score) - (home_score < away_score):
+            state["notice"] = (
+                "This correction changed the result of a final game "
+                f"({home_before}-{away_before} → {home_score}-{away_score}); "
+                "both teams' records have been updated."
+            )
+
+    def delete_selected(game, state, ids, scores_before):
+        try:
+            breaker.call(supabase.rpc("delete_score_logs", {"score_log_ids": ids}).execute)
+            st.toast(f"Removed {len(ids)} entries!")
+        except Exception as e:
+            st.toast(f"Error removing scores: {e}")
+            return
+        corrected(game, state, scores_before)
+
+    def reassign_selected(game, state, ids, player, scores_before):
+        try:
+            # Deleted and re-inserted for the new player in one transaction
+            breaker.call(supabase.rpc("reassign_score_logs", {
+                "score_log_ids": ids,
+                "new_player_name": player['name'],
+                "new_team_name": player['team_name'],
+            }).execute)
+            st.toast(f"Moved {len(ids)} entries to {player['name']}!")
+        except Exception as e:
+            st.toast(f"Error reassigning scores: {e}")
+            return
+        corrected(game, state, scores_before)
+
+    @st.fragment
+    def play_by_play(game):
+        game_id = game['id']
+        state = page_state(game_id)
+        if state["rows"] is None:
+            load_page(game_id, state)
+
+        home_score, away_score = game_scores(game)
+        st.markdown(f"### {game['home_team_name']} {home_score} - {away_score} {game['away_team_name']}")
+        if state.get("notice"):
+            st.warning(state["notice"])
+
+        rows = state["rows"]
+        page_number = len(state["cursors"])
+
+        nav_col1, nav_col2, nav_col3, nav_col4 = st.columns([1, 1, 1, 3])
+        with nav_col1:
+            st.button("← Newer", use_container_width=True, disabled=page_number == 1,
+                      on_click=newer_page, args=(game_id, state))
+        with nav_col2:
+            st.button("Older →", use_container_width=True, disabled=not state["has_more"],
+                      on_click=older_page, args=(game_id, state))
+        with nav_col3:
+            st.button("Refresh", use_container_width=True, on_click=load_page, args=(game_id, state))
+        with nav_col4:
+            st.caption(f"Page {page_number}, newest first")
+
+        if not rows:
+            st.info("No scores logged for this game.")
+            return
+
+        table = pd.DataFrame([
+            {
+                "Time": datetime.fromisoformat(row['created_at'].replace('Z', '+00:00')).strftime("%I:%M:%S %p"),
+                "Player": row['player_name'],
+                "Team": row['team_name'],
+                "Points": row['points'],
+            }
+            for row in rows
+        ])
+        event = st.dataframe(
+            table,
+            use_container_width=True,
+            hide_index=True,
+            on_select="rerun",
+            selection_mode="multi-row",
+            key=f"play_by_play_table_{game_id}_{state['version']}",
+        )
+        selected = [rows[i] for i in event.selection.rows]
+        ids = [row['id'] for row in selected]
+
+        st.markdown("#### Correct Selected Entries")
+        if not selected:
+            st.caption("Select rows in the table to delete them or move them to another player.")
+            return
+
+        players = [
+            player
+            for team_name in (game['home_team_name'], game['away_team_name'])
+            for player in fetch_players_for_team(team_name, division_generation(division))
+        ]
+        player_options = {f"#{p['jersey_number']} {p['name']} ({p['team_name']})": p for p in players}
+        scores_before = (home_score, away_score)
+
+        action_col1, action_col2 = st.columns(2)
+        with action_col1:
+            reassign_to = st.selectbox("Reassign to", options=list(player_options.keys()))
+            st.button(
+                f"Reassign {len(ids)} Selected",
+                use_container_width=True,
+                disabled=reassign_to is None,
+                on_click=reassign_selected,
+                args=(game, state, ids, player_options.get(reassign_to), scores_before),
+            )
+
+        with action_col2:
+            st.write(f"{sum(row['points'] for row in selected)} points in {len(ids)} entries selected")
+            st.button(
+                f"Delete {len(ids)} Selected",
+                use_container_width=True,
+                type="primary",
+                on_click=delete_selected,
+                args=(game, state, ids, scores_before),
+            )
+
+    generation = division_generation(division)
+    games = fetch_games(division, generation)
+
+    if games:
+        game_options = {}
+        for game in games:
+            start_time = datetime.fromisoformat(game['start_time'].replace('Z', '+00:00'))
+            label = (
+                f"{game['home_team_name']} vs {game['away_team_name']} - "
+                f"{start_time.strftime('%b %d, %I:%M %p')} ({game['status'].title()})"
+            )
+            game_options[label] = game
+
+        selected_label = st.selectbox("Select game", options=list(game_options.keys()))
+        play_by_play(game_options[selected_label])
+    else:
+        st.info(f"No live or final games in {division} yet.")
+
+    show_data_status()
+else:
+    st.warning("Please configure your Supabase credentials to use the play-by-play.")
@@ -0,0 +1,63 @@
+"""
+Run the live-score broadcaster.
+
+From the repository root:
+
+    python -m broadcaster                  # Supabase Realtime (SUPABASE_URL / SUPABASE_KEY)
+    python -m broadcaster --fake           # simulated games, no Supabase needed
+"""
+import argparse
+import asyncio
+import logging
+import os
+
+from broadcaster.hub import Hub
+from broadcaster.scoreboard import LiveScores
+from broadcaster.server import BroadcastServer
+from broadcaster.sources import FakeChangeSource, SupabaseChangeSource
+
+
+async def serve(args):
+    hub = Hub()
+    scores = LiveScores(hub.publish)
+
+    if args.fake:
+        source = FakeChangeSource(
+            scores,
+            games=args.fake_games,
+            baskets_per_second=args.fake_rate,
+            baskets_per_game=args.fake_game_length,
+        )
+    else:
+        from dotenv import load_dotenv
+        load_dotenv()
+        url, key = os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY")
+        if not url or not key:
+            raise SystemExit("Missing SUPABASE_URL / SUPABASE_KEY (the anon key is enough).")
+        source = SupabaseChangeSource(url, key, scores)
+
+    server = await BroadcastServer(scores, hub).start(args.host, args.port)
+    logging.info("Broadcasting on http://%s:%d", args.host, args.port)
+    async with server:
+        await asyncio.gather(server.serve_forever(), source.run())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Push live score deltas to public viewers over SSE.")
+    parser.add_argument("--host", default=os.getenv("BROADCASTER_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("BROADCASTER_PORT", "8765")))
+    parser.add_argument("--fake", action="store_true", help="simulate games instead of using Supabase")
+    parser.add_argument("--fake-games", type=int, default=4, help="simulated games live at once")
+    parser.add_argument("--fake-rate", type=float, default=5.0, help="simulated baskets per second")
+    parser.add_argument("--fake-game-length", type=int, default=120, help="baskets before a simulated game ends")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
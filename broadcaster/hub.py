@@ -0,0 +1,84 @@
+"""
+Fan-out of score messages to connected viewers.
+
+Each message is serialized once into a Server-Sent Events frame and the
+same bytes are handed to every subscriber of that game (and to everyone
+watching all games). Subscribers have a bounded backlog; a viewer that
+falls too far behind is not disconnected but marked stale, and its
+connection sends a fresh snapshot instead of the missed frames.
+"""
+import asyncio
+import json
+from collections import deque
+
+# Frames a viewer may fall behind by before it is resynced with a snapshot
+MAX_BACKLOG = 500
+
+
+def sse_frame(message, seq=None):
+    lines = []
+    if seq is not None:
+        lines.append(f"id: {seq}")
+    lines.append(f"event: {message['type']}")
+    lines.append("data: " + json.dumps(message, separators=(",", ":")))
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+class Subscriber:
+    __slots__ = ("game_id", "frames", "stale", "ready")
+
+    def __init__(self, game_id):
+        self.game_id = game_id
+        self.frames = deque()
+        self.stale = False
+        self.ready = asyncio.Event()
+
+    def push(self, frame):
+        if self.stale:
+            return
+        if len(self.frames) >= MAX_BACKLOG:
+            self.frames.clear()
+            self.stale = True
+        else:
+            self.frames.append(frame)
+        self.ready.set()
+
+    def take(self):
+        """Return (frames, stale) queued since the last take."""
+        frames, stale = list(self.frames), self.stale
+        self.frames.clear()
+        self.stale = False
+        self.ready.clear()
+        return frames, stale
+
+
+class Hub:
+    """Subscribers by game id; None subscribes to every game."""
+
+    def __init__(self):
+        self.seq = 0
+        self.published = 0
+        self._subscribers = {}
+
+    def subscribe(self, game_id=None):
+        subscriber = Subscriber(game_id)
+        self._subscribers.setdefault(game_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        subscribers = self._subscribers.get(subscriber.game_id)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[subscriber.game_id]
+
+    def client_count(self):
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def publish(self, message):
+        self.seq += 1
+        self.published += 1
+        frame = sse_frame(message, self.seq)
+        for game_id in (message["game_id"], None):
+            for subscriber in self._subscribers.get(game_id, ()):
+                subscriber.push(frame)
@@ -0,0 +1,171 @@
+"""
+Load test: many SSE viewers against one broadcaster.
+
+Starts the broadcaster with simulated games in a subprocess (or targets a
+running one with --url), connects the viewers spread over the live games,
+and reports delivery latency from basket to viewer, throughput and the
+server's CPU and memory.
+
+    python -m broadcaster.load_test --viewers 2000 --seconds 30
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+
+class Viewer:
+    __slots__ = ("messages", "bytes", "latencies", "snapshots")
+
+    def __init__(self):
+        self.messages = 0
+        self.bytes = 0
+        self.latencies = []
+        self.snapshots = 0
+
+
+async def open_stream(host, port, path):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nAccept: text/event-stream\r\n\r\n".encode())
+    await writer.drain()
+    while (await reader.readline()) not in (b"\r\n", b""):
+        pass
+    return reader, writer
+
+
+async def watch(reader, writer, viewer, stop):
+    event = None
+    try:
+        while not stop.is_set():
+            line = await reader.readline()
+            if not line:
+                break
+            viewer.bytes += len(line)
+            if line.startswith(b"event: "):
+                event = line[7:].strip()
+            elif line.startswith(b"data: "):
+                viewer.messages += 1
+                if event == b"score":
+                    sent = json.loads(line[6:])["event"]["created_at"]
+                    viewer.latencies.append(time.time() - datetime.fromisoformat(sent).timestamp())
+                elif event == b"snapshot":
+                    viewer.snapshots += 1
+    finally:
+        writer.close()
+
+
+def proc_usage(pid):
+    """(CPU seconds, resident MB) of a process, from /proc (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        with open(f"/proc/{pid}/status") as f:
+            rss = next(int(line.split()[1]) for line in f if line.startswith("VmRSS"))
+        return cpu, rss / 1024
+    except (OSError, StopIteration, IndexError):
+        return None, None
+
+
+def percentile(values, pct):
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def run(args):
+    url = urlsplit(args.url)
+    host, port = url.hostname, url.port or 80
+
+    connected = 0
+    viewers = [Viewer() for _ in range(args.viewers)]
+    stop = asyncio.Event()
+    semaphore = asyncio.Semaphore(200)
+
+    async def connect(i, viewer):
+        nonlocal connected
+        # Spread viewers over the live games; a few watch the whole league
+        path = "/events" if i % 50 == 0 else f"/games/{1 + i % args.games}/events"
+        async with semaphore:
+            try:
+                reader, writer = await open_stream(host, port, path)
+            except OSError as e:
+                print(f"viewer {i}: {e}")
+                return None
+        connected += 1
+        return asyncio.create_task(watch(reader, writer, viewer, stop))
+
+    started = time.perf_counter()
+    tasks = [t for t in await asyncio.gather(*(connect(i, v) for i, v in enumerate(viewers))) if t]
+    await asyncio.sleep(1)
+    print(f"{connected} viewers connected in {time.perf_counter() - started:.1f}s")
+
+    cpu_before, _ = proc_usage(args.server_pid) if args.server_pid else (None, None)
+    for viewer in viewers:
+        viewer.messages = viewer.bytes = viewer.snapshots = 0
+        viewer.latencies.clear()
+    await asyncio.sleep(args.seconds)
+    cpu_after, rss = proc_usage(args.server_pid) if args.server_pid else (None, None)
+
+    stop.set()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    messages = sum(v.messages for v in viewers)
+    total_bytes = sum(v.bytes for v in viewers)
+    latencies = sorted(l for v in viewers for l in v.latencies)
+    print(f"Delivered {messages} messages in {args.seconds}s ({messages / args.seconds:.0f}/s, "
+          f"{total_bytes / max(messages, 1):.0f} bytes each)")
+    if latencies:
+        print("Basket-to-viewer latency: p50 {:.1f} ms, p95 {:.1f} ms, p99 {:.1f} ms, max {:.1f} ms".format(
+            *(1000 * percentile(latencies, p) for p in (50, 95, 99)), 1000 * latencies[-1]))
+    resynced = sum(1 for v in viewers if v.snapshots)
+    if resynced:
+        print(f"{resynced} viewer(s) fell behind and were resynced with a snapshot")
+    if cpu_after is not None:
+        print(f"Server: {100 * (cpu_after - cpu_before) / args.seconds:.0f}% of one core, {rss:.0f} MB resident")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the live-score broadcaster.")
+    parser.add_argument("--viewers", type=int, default=1000)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--games", type=int, default=4, help="live games to spread viewers over")
+    parser.add_argument("--rate", type=float, default=5.0, help="baskets per second across all games")
+    parser.add_argument("--url", help="test a running broadcaster instead of starting one")
+    parser.add_argument("--port", type=int, default=8799)
+    args = parser.parse_args(argv)
+
+    # Every viewer is a socket on each side
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    server = None
+    args.server_pid = None
+    if args.url is None:
+        args.url = f"http://127.0.0.1:{args.port}"
+        server = subprocess.Popen([
+            sys.executable, "-m", "broadcaster", "--fake",
+            "--host", "127.0.0.1", "--port", str(args.port),
+            "--fake-games", str(args.games), "--fake-rate", str(args.rate),
+            # Keep the simulated games live for the whole test
+            "--fake-game-length", "1000000",
+        ], cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), stderr=subprocess.DEVNULL)
+        args.server_pid = server.pid
+        time.sleep(1.5)
+
+    try:
+        asyncio.run(run(args))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+In-memory live scores.
+
+LiveScores is fed ledger inserts, tombstones and game rows from a change
+source, keeps each live game's per-team totals, and turns every change
+into one compact message for the hub:
+
+    snapshot  {"type", "game_id", "status", "home", "away", "scores", "last"}
+    score     {"type", "game_id", "team", "total", "event"}
+    undo      {"type", "game_id", "team", "total", "event"}
+    status    {"type", "game_id", "status"}
+
+event is the ledger row that changed the total: id, player_name, points,
+created_at (undo events carry only id and points).
+
+Changes are idempotent: each game remembers the ledger ids it has counted
+and removed, so a row seen twice (realtime replay, resync overlap) or a
+tombstone that arrives before its insert never moves a total.
+
+Ledger rows for games that are not tracked are ignored. A game is only
+tracked once it has been seen live (a games change or a load()), with
+its whole ledger, so corrections to a final game (reassign_score_logs()
+deletes and re-inserts rows) never show it as live with a partial score.
+"""
+
+
+class GameState:
+    __slots__ = ("game_id", "home", "away", "status", "totals", "counted", "removed", "last")
+
+    def __init__(self, game_id, home=None, away=None, status="live"):
+        self.game_id = game_id
+        self.home = home
+        self.away = away
+        self.status = status
+        self.totals = {}
+        self.counted = set()
+        self.removed = set()
+        self.last = None
+
+    def snapshot(self):
+        scores = dict(self.totals)
+        for team in (self.home, self.away):
+            if team is not None:
+                scores.setdefault(team, 0)
+        return {
+            "type": "snapshot",
+            "game_id": self.game_id,
+            "status": self.status,
+            "home": self.home,
+            "away": self.away,
+            "scores": scores,
+            "last": self.last,
+        }
+
+
+def _score_event(row):
+    return {
+        "id": row["id"],
+        "player_name": row["player_name"],
+        "points": row["points"],
+        "created_at": row["created_at"],
+    }
+
+
+class LiveScores:
+    """
+    Per-game score state; every change is passed to publish(message).
+
+    Only live games are tracked. A game that goes final is announced once
+    and then forgotten.
+    """
+
+    def __init__(self, publish):
+        self.publish = publish
+        self.games = {}
+
+    def _game(self, game_id):
+        game = self.games.get(game_id)
+        if game is None:
+            game = self.games[game_id] = GameState(game_id)
+        return game
+
+    def snapshot(self, game_id):
+        game = self.games.get(game_id)
+        return game.snapshot() if game else None
+
+    def snapshots(self):
+        return [game.snapshot() for game in self.games.values()]
+
+    # ------------------------------------------
+    # Changes
+    # ------------------------------------------
+    def score_logged(self, row):
+        """A score_logs insert."""
+        game = self.games.get(row["game_id"])
+        if game is None:
+            return
+        if row["id"] in game.counted or row["id"] in game.removed:
+            return
+        game.counted.add(row["id"])
+        team = row["team_name"]
+        game.totals[team] = game.totals.get(team, 0) + row["points"]
+        game.last = _score_event(row)
+        self.publish({
+            "type": "score",
+            "game_id": game.game_id,
+            "team": team,
+            "total": game.totals[team],
+            "event": game.last,
+        })
+
+    def score_removed(self, tombstone):
+        """A score_log_tombstones insert (Undo or a deleted game)."""
+        game = self.games.get(tombstone["game_id"])
+        if game is None:
+            return
+        score_id = tombstone["score_log_id"]
+        game.removed.add(score_id)
+        if score_id not in game.counted:
+            return
+        game.counted.discard(score_id)
+        team = tombstone["team_name"]
+        game.totals[team] = game.totals.get(team, 0) - tombstone["points"]
+        if game.last and game.last["id"] == score_id:
+            game.last = None
+        self.publish({
+            "type": "undo",
+            "game_id": game.game_id,
+            "team": team,
+            "total": game.totals[team],
+            "event": {"id": score_id, "points": tombstone["points"]},
+        })
+
+    def game_changed(self, row):
+        """A games insert or update."""
+        game_id = row["id"]
+        if row["status"] != "live" and game_id not in self.games:
+            return
+        game = self._game(game_id)
+        teams_changed = (game.home, game.away) != (row["home_team_name"], row["away_team_name"])
+        game.home, game.away = row["home_team_name"], row["away_team_name"]
+
+        if row["status"] != "live":
+            self.games.pop(game_id)
+            self.publish({"type": "status", "game_id": game_id, "status": row["status"]})
+        elif game.status != "live" or teams_changed:
+            game.status = "live"
+            self.publish(game.snapshot())
+
+    def game_deleted(self, game_id):
+        if self.games.pop(game_id, None) is not None:
+            self.publish({"type": "status", "game_id": game_id, "status": "deleted"})
+
+    def load(self, live_games, score_logs, ended_games=()):
+        """
+        Replace state with freshly fetched live games and their ledger rows.
+
+        Used at startup and after every (re)subscribe, since changes made
+        while the change stream was down are never replayed. ended_games are
+        previously tracked games that are no longer live. Only games whose
+        state actually changed are published.
+        """
+        fresh = {}
+        for row in live_games:
+            fresh[row["id"]] = GameState(row["id"], row["home_team_name"], row["away_team_name"])
+        for row in sorted(score_logs, key=lambda r: r["id"]):
+            game = fresh.get(row["game_id"])
+            if game is None:
+                continue
+            game.counted.add(row["id"])
+            game.totals[row["team_name"]] = game.totals.get(row["team_name"], 0) + row["points"]
+            game.last = _score_event(row)
+
+        for row in ended_games:
+            if self.games.pop(row["id"], None) is not None:
+                self.publish({"type": "status", "game_id": row["id"], "status": row["status"]})
+
+        for game_id, game in fresh.items():
+            old = self.games.get(game_id)
+            self.games[game_id] = game
+            if old is None or old.snapshot() != game.snapshot():
+                self.publish(game.snapshot())
@@ -0,0 +1,124 @@
+"""
+Server-Sent Events endpoint for public viewers.
+
+    GET /games/<id>/events   one game's snapshot, then its deltas
+    GET /events              every live game
+    GET /games               JSON snapshots of every live game
+    GET /health              viewer and game counts
+
+Browsers consume the streams with EventSource, which reconnects on its own;
+every (re)connect starts with a snapshot, so no replay buffer is needed.
+Plain asyncio streams keep the service free of web framework dependencies.
+"""
+import asyncio
+import json
+import re
+
+from broadcaster.hub import sse_frame
+
+HEARTBEAT_SECONDS = 15
+
+GAME_EVENTS = re.compile(r"^/games/(\d+)/events$")
+
+SSE_HEADERS = (
+    "HTTP/1.1 200 OK\r\n"
+    "Content-Type: text/event-stream\r\n"
+    "Cache-Control: no-cache\r\n"
+    "Connection: keep-alive\r\n"
+    "Access-Control-Allow-Origin: *\r\n"
+    "X-Accel-Buffering: no\r\n"
+    "\r\n"
+    # Reconnect after 3 seconds if the stream drops
+    "retry: 3000\n\n"
+).encode()
+
+
+def json_response(status, body):
+    payload = json.dumps(body).encode()
+    head = (
+        f"HTTP/1.1 {status}\r\n"
+        "Content-Type: application/json\r\n"
+        "Access-Control-Allow-Origin: *\r\n"
+        f"Content-Length: {len(payload)}\r\n"
+        "Connection: close\r\n"
+        "\r\n"
+    )
+    return head.encode() + payload
+
+
+class BroadcastServer:
+    def __init__(self, scores, hub, heartbeat=HEARTBEAT_SECONDS):
+        self.scores = scores
+        self.hub = hub
+        self.heartbeat = heartbeat
+
+    async def start(self, host, port):
+        # A large backlog so a burst of viewers at tip-off is not refused
+        return await asyncio.start_server(self.handle, host, port, backlog=4096)
+
+    async def handle(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            # Headers are not needed; read past them
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split()
+            if len(parts) < 2 or parts[0] != "GET":
+                writer.write(json_response("405 Method Not Allowed", {"error": "GET only"}))
+                return
+
+            path = parts[1].split("?", 1)[0]
+            match = GAME_EVENTS.match(path)
+            if match:
+                await self.stream(writer, int(match.group(1)))
+            elif path == "/events":
+                await self.stream(writer, None)
+            elif path == "/games":
+                writer.write(json_response("200 OK", self.scores.snapshots()))
+            elif path == "/health":
+                writer.write(json_response("200 OK", {
+                    "viewers": self.hub.client_count(),
+                    "games": len(self.scores.games),
+                    "published": self.hub.published,
+                }))
+            else:
+                writer.write(json_response("404 Not Found", {"error": "not found"}))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            try:
+                await writer.drain()
+                writer.close()
+            except ConnectionError:
+                pass
+
+    def _snapshot_frames(self, game_id):
+        if game_id is None:
+            snapshots = self.scores.snapshots()
+        else:
+            snapshot = self.scores.snapshot(game_id)
+            snapshots = [snapshot] if snapshot else []
+        return [sse_frame(snapshot) for snapshot in snapshots]
+
+    async def stream(self, writer, game_id):
+        # Subscribe before taking the snapshot so nothing falls in between;
+        # a delta that is also in the snapshot only repeats a total
+        subscriber = self.hub.subscribe(game_id)
+        try:
+            writer.write(SSE_HEADERS + b"".join(self._snapshot_frames(game_id)))
+            await writer.drain()
+            while True:
+                try:
+                    await asyncio.wait_for(subscriber.ready.wait(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    writer.write(b": ping\n\n")
+                    await writer.drain()
+                    continue
+
+                frames, stale = subscriber.take()
+                if stale:
+                    frames = self._snapshot_frames(game_id)
+                writer.write(b"".join(frames))
+                await writer.drain()
+        finally:
+            self.hub.unsubscribe(subscriber)
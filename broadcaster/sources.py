@@ -0,0 +1,198 @@
+"""
+Change sources that feed LiveScores.
+
+SupabaseChangeSource holds the service's single Realtime subscription to
+score_logs, score_log_tombstones and games, however many viewers are
+connected. FakeChangeSource plays simulated games for local development
+and the load test.
+"""
+import asyncio
+import logging
+import random
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+# PostgREST caps responses at 1000 rows by default
+PAGE_SIZE = 1000
+
+
+class SupabaseChangeSource:
+    """
+    Streams ledger and game changes from Supabase Realtime.
+
+    On every (re)subscribe the live games are reloaded over REST, because
+    Realtime does not replay changes missed while disconnected. Changes that
+    arrive during a reload are held back and applied after it, which is
+    safe because LiveScores ignores rows it has already counted.
+    """
+
+    def __init__(self, url, key, scores, resync_seconds=300):
+        self.url = url
+        self.key = key
+        self.scores = scores
+        self.resync_seconds = resync_seconds
+        self._held = None
+        self._resync_requested = asyncio.Event()
+
+    def _apply(self, change, row):
+        if self._held is not None:
+            self._held.append((change, row))
+        else:
+            change(row)
+
+    def _on_score_log(self, payload):
+        self._apply(self.scores.score_logged, payload["data"]["record"])
+
+    def _on_tombstone(self, payload):
+        self._apply(self.scores.score_removed, payload["data"]["record"])
+
+    def _on_game(self, payload):
+        data = payload["data"]
+        if data["type"] == "DELETE":
+            self._apply(self.scores.game_deleted, data["old_record"]["id"])
+            return
+        row = data["record"]
+        starting = row["status"] == "live" and row["id"] not in self.scores.games
+        self._apply(self.scores.game_changed, row)
+        if starting:
+            # A game reopened from final already has ledger rows; load them
+            self._resync_requested.set()
+
+    def _on_subscribe(self, state, error):
+        logger.info("Realtime subscription %s %s", state, error or "")
+        if str(state).endswith("SUBSCRIBED"):
+            self._resync_requested.set()
+
+    async def _fetch_all(self, query):
+        rows, after_id = [], 0
+        while True:
+            page = (await query().gt("id", after_id).order("id").limit(PAGE_SIZE).execute()).data
+            rows.extend(page)
+            if len(page) < PAGE_SIZE:
+                return rows
+            after_id = page[-1]["id"]
+
+    async def resync(self, client):
+        self._held = []
+        try:
+            live_games = (await client.table("games").select("*").eq("status", "live").execute()).data
+            live_ids = [game["id"] for game in live_games]
+            score_logs = await self._fetch_all(
+                lambda: client.table("score_logs").select("*").in_("game_id", live_ids)
+            ) if live_ids else []
+
+            ended_ids = [game_id for game_id in self.scores.games if game_id not in live_ids]
+            ended_games = (
+                await client.table("games").select("id,status").in_("id", ended_ids).execute()
+            ).data if ended_ids else []
+            # Tracked games that no longer exist were deleted
+            found = {game["id"] for game in ended_games}
+            ended_games += [{"id": game_id, "status": "deleted"} for game_id in ended_ids if game_id not in found]
+
+            self.scores.load(live_games, score_logs, ended_games)
+        finally:
+            held, self._held = self._held, None
+            for change, row in held:
+                change(row)
+        logger.info("Resynced %d live game(s)", len(self.scores.games))
+
+    async def run(self):
+        from supabase import acreate_client
+
+        client = await acreate_client(self.url, self.key)
+        channel = client.channel("broadcaster")
+        channel.on_postgres_changes("INSERT", self._on_score_log, table="score_logs", schema="public")
+        channel.on_postgres_changes("INSERT", self._on_tombstone, table="score_log_tombstones", schema="public")
+        channel.on_postgres_changes("*", self._on_game, table="games", schema="public")
+        await channel.subscribe(self._on_subscribe)
+
+        while True:
+            try:
+                await asyncio.wait_for(self._resync_requested.wait(), self.resync_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._resync_requested.clear()
+            try:
+                await self.resync(client)
+            except Exception:
+                logger.exception("Resync failed; retrying in 5 seconds")
+                await asyncio.sleep(5)
+                self._resync_requested.set()
+
+
+class FakeChangeSource:
+    """
+    Simulated league night: games live at once, baskets_per_second across
+    all of them, an occasional Undo, and a new game whenever one ends.
+    """
+
+    def __init__(self, scores, games=4, baskets_per_second=5.0, undo_rate=0.03,
+                 baskets_per_game=120, seed=None):
+        self.scores = scores
+        self.games = games
+        self.baskets_per_second = baskets_per_second
+        self.undo_rate = undo_rate
+        self.baskets_per_game = baskets_per_game
+        self.random = random.Random(seed)
+        self._ids = {"game": 0, "score": 0, "tombstone": 0}
+        self._live = {}
+
+    def _next(self, kind):
+        self._ids[kind] += 1
+        return self._ids[kind]
+
+    def _start_game(self):
+        game_id = self._next("game")
+        row = {
+            "id": game_id,
+            "home_team_name": f"Home {game_id}",
+            "away_team_name": f"Away {game_id}",
+            "status": "live",
+        }
+        self._live[game_id] = {"row": row, "baskets": []}
+        self.scores.game_changed(row)
+
+    def step(self):
+        """Apply one simulated change."""
+        game_id = self.random.choice(list(self._live))
+        game = self._live[game_id]
+
+        if game["baskets"] and self.random.random() < self.undo_rate:
+            basket = game["baskets"].pop()
+            self.scores.score_removed({
+                "id": self._next("tombstone"),
+                "score_log_id": basket["id"],
+                "game_id": game_id,
+                "team_name": basket["team_name"],
+                "points": basket["points"],
+            })
+            return
+
+        team = self.random.choice([game["row"]["home_team_name"], game["row"]["away_team_name"]])
+        basket = {
+            "id": self._next("score"),
+            "game_id": game_id,
+            "player_name": f"{team} #{self.random.randint(0, 14)}",
+            "team_name": team,
+            "points": self.random.choice([1, 2, 2, 2, 3]),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        game["baskets"].append(basket)
+        self.scores.score_logged(basket)
+
+        if len(game["baskets"]) >= self.baskets_per_game:
+            del self._live[game_id]
+            self.scores.game_changed({**game["row"], "status": "final"})
+            self._start_game()
+
+    async def run(self):
+        for _ in range(self.games):
+            self._start_game()
+        interval = 1 / self.baskets_per_second
+        loop = asyncio.get_running_loop()
+        next_at = loop.time()
+        while True:
+            self.step()
+            next_at += interval
+            await asyncio.sleep(max(0, next_at - loop.time()))
@@ -0,0 +1,315 @@
+"""
+Query-plan regression check for schema.sql.
+
+Loads the schema into a scratch Postgres schema, fills it with many seasons
+of synthetic league data, then runs every query the admin pages (and the
+public app's per-game queries) issue under EXPLAIN ANALYZE. The check fails
+when a query:
+  - sequential-scans a table it should reach through an index,
+  - changes plan shape compared with plan_baseline.json, or
+  - runs much slower than its recorded baseline.
+
+Usage (needs psycopg: pip install -r database/requirements.txt):
+
+    DATABASE_URL=postgresql://localhost/postgres python database/plan_check.py
+    python database/plan_check.py --update-baseline   # after an intended change
+
+Everything is created in a throwaway "plan_check" schema that is dropped
+and recreated on every run; no other schema is touched.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+from collections import namedtuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCHEMA_FILE = os.path.join(HERE, "schema.sql")
+BASELINE_FILE = os.path.join(HERE, "plan_baseline.json")
+SCRATCH_SCHEMA = "plan_check"
+
+# Supabase-only statements (roles, RLS, realtime) that a plain Postgres lacks
+SKIPPED_STATEMENTS = re.compile(
+    r"^\s*(CREATE POLICY|ALTER PUBLICATION|REVOKE|ALTER TABLE \w+ ENABLE ROW LEVEL SECURITY)",
+    re.IGNORECASE,
+)
+
+# no_seq_scan lists the tables the query must reach through an index
+PlanQuery = namedtuple("PlanQuery", ["name", "sql", "no_seq_scan"])
+
+QUERIES = [
+    # Live Scorer
+    PlanQuery(
+        "live_games",
+        "SELECT * FROM games WHERE division_name = %(division)s AND status = 'live'",
+        ("games",),
+    ),
+    PlanQuery(
+        "scheduled_games",
+        "SELECT * FROM games WHERE division_name = %(division)s AND status = 'scheduled' ORDER BY start_time",
+        ("games",),
+    ),
+    PlanQuery(
+        "players_for_team",
+        "SELECT * FROM players WHERE team_name = %(team)s ORDER BY jersey_number",
+        ("players",),
+    ),
+    PlanQuery(
+        "game_team_score",
+        "SELECT points FROM score_logs WHERE game_id = %(game_id)s AND team_name = %(team)s",
+        ("score_logs",),
+    ),
+    PlanQuery(
+        "recent_scores",
+        "SELECT * FROM score_logs WHERE game_id = %(game_id)s ORDER BY created_at DESC LIMIT 10",
+        ("score_logs",),
+    ),
+    # Ledger replica sync, one replica per division
+    PlanQuery(
+        "ledger_sync",
+        "SELECT id, game_id, player_name, team_name, points, created_at FROM score_logs "
+        "WHERE division_name = %(division)s AND id > %(ledger_mark)s ORDER BY id LIMIT 1000",
+        ("score_logs",),
+    ),
+    PlanQuery(
+        # A division added mid-season must not scan the other divisions' rows
+        "new_division_sync",
+        "SELECT id, game_id, player_name, team_name, points, created_at FROM score_logs "
+        "WHERE division_name = 'New Division' AND id > 0 ORDER BY id LIMIT 1000",
+        ("score_logs",),
+    ),
+    PlanQuery(
+        "tombstone_sync",
+        "SELECT id, score_log_id FROM score_log_tombstones "
+        "WHERE division_name = %(division)s AND id > %(tombstone_mark)s ORDER BY id LIMIT 1000",
+        ("score_log_tombstones",),
+    ),
+    PlanQuery(
+        "latest_tombstone",
+        "SELECT id FROM score_log_tombstones WHERE division_name = %(division)s ORDER BY id DESC LIMIT 1",
+        ("score_log_tombstones",),
+    ),
+    # Teams, Players, Schedule, Rankings
+    PlanQuery("divisions_by_name", "SELECT name FROM divisions ORDER BY name", ()),
+    PlanQuery("division_teams", "SELECT * FROM teams WHERE division_name = %(division)s ORDER BY name", ()),
+    PlanQuery("players_by_name", "SELECT * FROM players ORDER BY name", ()),
+    PlanQuery(
+        "division_schedule",
+        "SELECT * FROM games WHERE division_name = %(division)s ORDER BY start_time DESC",
+        (),
+    ),
+    PlanQuery(
+        "division_final_games",
+        "SELECT * FROM games WHERE division_name = %(division)s AND status = 'final'",
+        (),
+    ),
+    # Nightly reconciliation: whole-league aggregate, timed only
+    PlanQuery("team_record_audit", "SELECT * FROM team_record_audit", ()),
+]
+
+SYNTHETIC_DATA = """
+INSERT INTO divisions (name)
+SELECT 'Division ' || d FROM generate_series(0, %(divisions)s - 1) d;
+INSERT INTO divisions (name) VALUES ('New Division');
+
+-- Team t plays in division (t - 1) %% divisions
+INSERT INTO teams (name, division_name)
+SELECT 'Team ' || t, 'Division ' || (t - 1) %% %(divisions)s
+FROM generate_series(1, %(teams)s) t;
+
+INSERT INTO players (team_name, name, jersey_number)
+SELECT 'Team ' || t, 'Player ' || t || '-' || j, j
+FROM generate_series(1, %(teams)s) t, generate_series(0, 14) j;
+
+-- Divisions take turns; within one, every team plays every other team in
+-- turn. The last games are still to come.
+INSERT INTO games (home_team_name, away_team_name, start_time, location, status)
+SELECT
+    'Team ' || (1 + d + %(divisions)s * home),
+    'Team ' || (1 + d + %(divisions)s * ((home + 1 + round_no %% (size - 1)) %% size)),
+    TIMESTAMPTZ '2015-01-01' + g * INTERVAL '4 hours',
+    'Court ' || (1 + g %% 3),
+    CASE
+        WHEN g > %(games)s - 2 * %(divisions)s THEN 'live'
+        WHEN g > %(games)s - 100 THEN 'scheduled'
+        ELSE 'final'
+    END
+FROM generate_series(1, %(games)s) g,
+LATERAL (
+    SELECT
+        g %% %(divisions)s AS d,
+        (g / %(divisions)s) %% (%(teams)s / %(divisions)s) AS home,
+        g / %(teams)s AS round_no,
+        %(teams)s / %(divisions)s AS size
+) pairing;
+
+INSERT INTO score_logs (game_id, player_name, team_name, points, created_at)
+SELECT
+    g.id,
+    'Player ' || g.id %% %(teams)s || '-' || i %% 15,
+    CASE WHEN i %% 2 = 0 THEN g.home_team_name ELSE g.away_team_name END,
+    1 + (i * 7 + g.id) %% 3,
+    g.start_time + i * INTERVAL '40 seconds'
+FROM games g, generate_series(1, %(baskets)s) i
+WHERE g.status <> 'scheduled';
+
+INSERT INTO score_log_tombstones (score_log_id, game_id, team_name, points, division_name)
+SELECT id, game_id, team_name, points, division_name FROM score_logs WHERE id %% 100 = 0;
+
+ANALYZE;
+"""
+
+
+def split_statements(sql):
+    """Split schema.sql into statements, keeping $$-quoted function bodies whole."""
+    statements, current, in_body = [], [], False
+    for line in sql.splitlines():
+        stripped = line.strip()
+        if not in_body and (not stripped or stripped.startswith("--")):
+            continue
+        current.append(line)
+        if line.count("$$") % 2:
+            in_body = not in_body
+        if not in_body and stripped.endswith(";"):
+            statements.append("\n".join(current))
+            current = []
+    return statements
+
+
+def load_schema(conn, sizes):
+    import psycopg
+
+    with open(SCHEMA_FILE) as f:
+        statements = [s for s in split_statements(f.read()) if not SKIPPED_STATEMENTS.match(s)]
+
+    conn.execute(f"DROP SCHEMA IF EXISTS {SCRATCH_SCHEMA} CASCADE")
+    conn.execute(f"CREATE SCHEMA {SCRATCH_SCHEMA}")
+    conn.execute(f"SET search_path = {SCRATCH_SCHEMA}")
+    for statement in statements:
+        conn.execute(statement)
+    # Client-side binding: the data script is several statements
+    with psycopg.ClientCursor(conn) as cursor:
+        cursor.execute(SYNTHETIC_DATA, sizes)
+
+
+def query_params(conn):
+    game_id, team, division = conn.execute(
+        "SELECT id, home_team_name, division_name FROM games WHERE status = 'final' ORDER BY id DESC LIMIT 1"
+    ).fetchone()
+    ledger_mark = conn.execute("SELECT MAX(id) - 500 FROM score_logs").fetchone()[0]
+    tombstone_mark = conn.execute("SELECT MAX(id) - 50 FROM score_log_tombstones").fetchone()[0]
+    return {
+        "game_id": game_id,
+        "team": team,
+        "division": division,
+        "ledger_mark": ledger_mark,
+        "tombstone_mark": tombstone_mark,
+    }
+
+
+def plan_nodes(plan):
+    """Flatten an EXPLAIN JSON plan into (node type, relation or index) pairs."""
+    node = (plan["Node Type"], plan.get("Index Name") or plan.get("Relation Name") or "")
+    nodes = [node]
+    for child in plan.get("Plans", []):
+        nodes.extend(plan_nodes(child))
+    return nodes
+
+
+def explain(cursor, query, params, runs):
+    timings = []
+    for _ in range(runs):
+        cursor.execute("EXPLAIN (ANALYZE, FORMAT JSON) " + query.sql, params)
+        result = cursor.fetchone()[0][0]
+        timings.append(result["Execution Time"])
+    return plan_nodes(result["Plan"]), statistics.median(timings)
+
+
+def check_query(query, nodes, ms, baseline, slowdown, slack_ms):
+    problems = []
+    seq_scanned = {relation for node_type, relation in nodes if node_type == "Seq Scan"}
+    for table in query.no_seq_scan:
+        if table in seq_scanned:
+            problems.append(f"sequential scan on {table}")
+
+    if baseline:
+        if [list(node) for node in nodes] != baseline["plan"]:
+            problems.append("plan changed from baseline")
+        if ms > baseline["ms"] * slowdown and ms > baseline["ms"] + slack_ms:
+            problems.append(f"{ms:.2f} ms vs baseline {baseline['ms']:.2f} ms")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check query plans against synthetic league data.")
+    parser.add_argument("--dsn", default=os.getenv("DATABASE_URL"), help="Postgres connection string (or DATABASE_URL)")
+    parser.add_argument("--divisions", type=int, default=4)
+    parser.add_argument("--teams", type=int, default=40, help="a multiple of --divisions")
+    parser.add_argument("--games", type=int, default=20000)
+    parser.add_argument("--baskets", type=int, default=60, help="ledger rows per game")
+    parser.add_argument("--runs", type=int, default=5, help="timed runs per query")
+    parser.add_argument("--slowdown", type=float, default=3.0, help="allowed slowdown factor vs baseline")
+    parser.add_argument("--slack-ms", type=float, default=5.0, help="ignore slowdowns smaller than this")
+    parser.add_argument("--update-baseline", action="store_true", help="record the current plans and timings")
+    args = parser.parse_args(argv)
+
+    if not args.dsn:
+        parser.error("set DATABASE_URL or pass --dsn")
+    if args.teams % args.divisions or args.teams // args.divisions < 2:
+        parser.error("--teams must be a multiple of --divisions, with at least 2 teams per division")
+
+    try:
+        import psycopg
+    except ImportError:
+        sys.exit("psycopg is required: pip install -r database/requirements.txt")
+
+    sizes = {"divisions": args.divisions, "teams": args.teams, "games": args.games, "baskets": args.baskets}
+
+    baselines = {}
+    if os.path.exists(BASELINE_FILE) and not args.update_baseline:
+        with open(BASELINE_FILE) as f:
+            recorded = json.load(f)
+        if recorded["sizes"] == sizes:
+            baselines = recorded["queries"]
+        else:
+            print(f"Baseline was recorded with {recorded['sizes']}; only checking for sequential scans.")
+    with psycopg.connect(args.dsn, autocommit=True) as conn:
+        print(f"Loading schema and synthetic data ({args.games} games, {args.games * args.baskets} ledger rows)...")
+        load_schema(conn, sizes)
+        params = query_params(conn)
+
+        results, failures = {}, 0
+        with psycopg.ClientCursor(conn) as cursor:
+            for query in QUERIES:
+                nodes, ms = explain(cursor, query, params, args.runs)
+                results[query.name] = {"plan": [list(node) for node in nodes], "ms": round(ms, 3)}
+                problems = check_query(query, nodes, ms, baselines.get(query.name), args.slowdown, args.slack_ms)
+                failures += bool(problems)
+
+                access = ", ".join(f"{t} {r}".strip() for t, r in nodes if r)
+                status = "FAIL: " + "; ".join(problems) if problems else "ok"
+                print(f"{query.name:<22} {ms:9.2f} ms  {access}  [{status}]")
+
+        conn.execute(f"DROP SCHEMA {SCRATCH_SCHEMA} CASCADE")
+
+    if args.update_baseline:
+        if failures:
+            print("Not recording a baseline with failing queries.")
+            return 1
+        with open(BASELINE_FILE, "w") as f:
+            json.dump({"sizes": sizes, "queries": results}, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {BASELINE_FILE}")
+        return 0
+
+    if failures:
+        print(f"{failures} query plan(s) regressed.")
+        return 1
+    print("All query plans ok.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
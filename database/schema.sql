@@ -2,6 +2,19 @@
 -- Run this in Supabase SQL Editor to set up your database
 -- NOTE: This schema uses names instead of IDs for easier readability
 
+-- ============================================
+-- Table 0: divisions
+-- Age divisions; teams only play teams in their own division
+-- ============================================
+CREATE TABLE IF NOT EXISTS divisions (
+    id BIGSERIAL PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Teams, games and ledger rows from before divisions land in 'Open'
+INSERT INTO divisions (name) VALUES ('Open') ON CONFLICT (name) DO NOTHING;
+
 -- ============================================
 -- Table 1: teams
 -- General team metadata
@@ -14,6 +27,14 @@ CREATE TABLE IF NOT EXISTS teams (
     created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+ALTER TABLE teams ADD COLUMN IF NOT EXISTS
+    division_name TEXT NOT NULL DEFAULT 'Open' REFERENCES divisions(name);
+
+-- Power rating (margin-adjusted Elo, see admin/league/ratings.py), updated
+-- when a game is finalized
+ALTER TABLE teams ADD COLUMN IF NOT EXISTS
+    rating DOUBLE PRECISION NOT NULL DEFAULT 1500;
+
 -- ============================================
 -- Table 2: players
 -- Roster information (uses team_name instead of team_id)
@@ -23,10 +44,16 @@ CREATE TABLE IF NOT EXISTS players (
     team_name TEXT NOT NULL,
     name TEXT NOT NULL,
     jersey_number INTEGER NOT NULL,
-    created_at TIMESTAMPTZ DEFAULT NOW(),
-    UNIQUE(team_name, jersey_number)
+    created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- One jersey number per team. Deferrable so a bulk roster save can swap
+-- numbers between players inside one transaction (re-created here so
+-- existing databases pick up the change when this file is re-run)
+ALTER TABLE players DROP CONSTRAINT IF EXISTS players_team_name_jersey_number_key;
+ALTER TABLE players ADD CONSTRAINT players_team_name_jersey_number_key
+    UNIQUE (team_name, jersey_number) DEFERRABLE INITIALLY IMMEDIATE;
+
 -- ============================================
 -- Table 3: games
 -- Schedule and game metadata (uses team names instead of IDs)
@@ -42,6 +69,57 @@ CREATE TABLE IF NOT EXISTS games (
     CONSTRAINT different_teams CHECK (home_team_name != away_team_name)
 );
 
+-- Copied from the home team by trigger so every division-scoped query
+-- filters games directly
+ALTER TABLE games ADD COLUMN IF NOT EXISTS
+    division_name TEXT NOT NULL DEFAULT 'Open' REFERENCES divisions(name);
+
+CREATE OR REPLACE FUNCTION set_game_division()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    away_division TEXT;
+BEGIN
+    SELECT division_name INTO NEW.division_name FROM teams WHERE name = NEW.home_team_name;
+    SELECT division_name INTO away_division FROM teams WHERE name = NEW.away_team_name;
+    IF NEW.division_name IS DISTINCT FROM away_division THEN
+        RAISE EXCEPTION '% and % are not in the same division', NEW.home_team_name, NEW.away_team_name;
+    END IF;
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS games_division ON games;
+CREATE TRIGGER games_division
+    BEFORE INSERT OR UPDATE OF home_team_name, away_team_name ON games
+    FOR EACH ROW EXECUTE FUNCTION set_game_division();
+
+-- A team's games, ledger rows and ratings are filed under its division,
+-- and its opponents stay behind, so only a team without games can move
+CREATE OR REPLACE FUNCTION check_team_division_change()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM games
+        WHERE home_team_name = OLD.name OR away_team_name = OLD.name
+    ) THEN
+        RAISE EXCEPTION '% already has games in %, so it can''t move to another division',
+            OLD.name, OLD.division_name;
+    END IF;
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS teams_division ON teams;
+CREATE TRIGGER teams_division
+    BEFORE UPDATE OF division_name ON teams
+    FOR EACH ROW
+    WHEN (OLD.division_name IS DISTINCT FROM NEW.division_name)
+    EXECUTE FUNCTION check_team_division_change();
+
 -- ============================================
 -- Table 4: score_logs (The Ledger)
 -- Every point scored is recorded here (uses names instead of IDs)
@@ -55,29 +133,134 @@ CREATE TABLE IF NOT EXISTS score_logs (
     created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Copied from the game by trigger, so each division's ledger replica
+-- syncs only its own rows
+ALTER TABLE score_logs ADD COLUMN IF NOT EXISTS
+    division_name TEXT NOT NULL DEFAULT 'Open';
+
+CREATE OR REPLACE FUNCTION set_score_log_division()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    SELECT division_name INTO NEW.division_name FROM games WHERE id = NEW.game_id;
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS score_logs_division ON score_logs;
+CREATE TRIGGER score_logs_division
+    BEFORE INSERT ON score_logs
+    FOR EACH ROW EXECUTE FUNCTION set_score_log_division();
+
+-- ============================================
+-- Table 5: score_log_tombstones
+-- One row per deleted ledger entry (Undo, game deletion), written by trigger.
+-- Lets the admin's local ledger replica sync deletions incrementally.
+-- ============================================
+CREATE TABLE IF NOT EXISTS score_log_tombstones (
+    id BIGSERIAL PRIMARY KEY,
+    score_log_id BIGINT NOT NULL,
+    game_id BIGINT NOT NULL,
+    team_name TEXT NOT NULL,
+    points INTEGER NOT NULL,
+    deleted_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+ALTER TABLE score_log_tombstones ADD COLUMN IF NOT EXISTS
+    division_name TEXT NOT NULL DEFAULT 'Open';
+
+CREATE OR REPLACE FUNCTION record_score_log_tombstone()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    INSERT INTO score_log_tombstones (score_log_id, game_id, team_name, points, division_name)
+    VALUES (OLD.id, OLD.game_id, OLD.team_name, OLD.points, OLD.division_name);
+    RETURN OLD;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS score_logs_tombstone ON score_logs;
+CREATE TRIGGER score_logs_tombstone
+    AFTER DELETE ON score_logs
+    FOR EACH ROW EXECUTE FUNCTION record_score_log_tombstone();
+
+-- ============================================
+-- Table 6: team_rating_history
+-- Each team's rating before and after every final game, written with
+-- teams.rating by save_team_ratings()
+-- ============================================
+CREATE TABLE IF NOT EXISTS team_rating_history (
+    id BIGSERIAL PRIMARY KEY,
+    game_id BIGINT NOT NULL REFERENCES games(id) ON DELETE CASCADE,
+    team_name TEXT NOT NULL,
+    division_name TEXT NOT NULL DEFAULT 'Open',
+    rating_before DOUBLE PRECISION NOT NULL,
+    rating_after DOUBLE PRECISION NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    UNIQUE (game_id, team_name)
+);
+
 -- ============================================
 -- Indexes for performance
+-- Matched to the queries the admin pages and public app issue; checked
+-- against synthetic data by database/plan_check.py
 -- ============================================
-CREATE INDEX IF NOT EXISTS idx_players_team_name ON players(team_name);
-CREATE INDEX IF NOT EXISTS idx_games_status ON games(status);
+-- players by team ORDER BY jersey_number: served by the
+-- players_team_name_jersey_number_key constraint index
+DROP INDEX IF EXISTS idx_players_team_name;
+
+-- Admin pages work on one division at a time
+CREATE INDEX IF NOT EXISTS idx_teams_division ON teams(division_name, name);
+
+-- games by division and status ORDER BY start_time (live, scheduled, final
+-- lists), and a division's whole schedule by start_time
+CREATE INDEX IF NOT EXISTS idx_games_division_status_start_time ON games(division_name, status, start_time);
+CREATE INDEX IF NOT EXISTS idx_games_division_start_time ON games(division_name, start_time);
+DROP INDEX IF EXISTS idx_games_status_start_time;
+DROP INDEX IF EXISTS idx_games_status;
 CREATE INDEX IF NOT EXISTS idx_games_start_time ON games(start_time);
 CREATE INDEX IF NOT EXISTS idx_games_home_team ON games(home_team_name);
 CREATE INDEX IF NOT EXISTS idx_games_away_team ON games(away_team_name);
-CREATE INDEX IF NOT EXISTS idx_score_logs_game_id ON score_logs(game_id);
+
+-- Team score for a game: index-only SUM(points) by (game_id, team_name)
+CREATE INDEX IF NOT EXISTS idx_score_logs_game_team ON score_logs(game_id, team_name) INCLUDE (points);
+DROP INDEX IF EXISTS idx_score_logs_game_id;
+
+-- Recent scores for a game: game_id ORDER BY created_at DESC LIMIT n
+CREATE INDEX IF NOT EXISTS idx_score_logs_game_created ON score_logs(game_id, created_at DESC, id DESC);
+
+-- Ledger replica sync: one division's rows above a watermark ORDER BY id
+CREATE INDEX IF NOT EXISTS idx_score_logs_division_id ON score_logs(division_name, id);
+CREATE INDEX IF NOT EXISTS idx_score_log_tombstones_division_id ON score_log_tombstones(division_name, id);
+
+-- A team's rating over the season, and rewriting a division's history
+CREATE INDEX IF NOT EXISTS idx_team_rating_history_team ON team_rating_history(team_name, game_id);
+CREATE INDEX IF NOT EXISTS idx_team_rating_history_division ON team_rating_history(division_name);
+
 CREATE INDEX IF NOT EXISTS idx_score_logs_player_name ON score_logs(player_name);
 CREATE INDEX IF NOT EXISTS idx_score_logs_team_name ON score_logs(team_name);
 
 -- ============================================
 -- Enable Row Level Security (RLS)
 -- ============================================
+ALTER TABLE divisions ENABLE ROW LEVEL SECURITY;
 ALTER TABLE teams ENABLE ROW LEVEL SECURITY;
 ALTER TABLE players ENABLE ROW LEVEL SECURITY;
 ALTER TABLE games ENABLE ROW LEVEL SECURITY;
 ALTER TABLE score_logs ENABLE ROW LEVEL SECURITY;
+ALTER TABLE score_log_tombstones ENABLE ROW LEVEL SECURITY;
+ALTER TABLE team_rating_history ENABLE ROW LEVEL SECURITY;
 
 -- ============================================
 -- RLS Policies: Public read access
 -- ============================================
+CREATE POLICY "Public read access for divisions" ON divisions
+    FOR SELECT USING (true);
+
 CREATE POLICY "Public read access for teams" ON teams
     FOR SELECT USING (true);
 
@@ -90,10 +273,19 @@ CREATE POLICY "Public read access for games" ON games
 CREATE POLICY "Public read access for score_logs" ON score_logs
     FOR SELECT USING (true);
 
+CREATE POLICY "Public read access for score_log_tombstones" ON score_log_tombstones
+    FOR SELECT USING (true);
+
+CREATE POLICY "Public read access for team_rating_history" ON team_rating_history
+    FOR SELECT USING (true);
+
 -- ============================================
 -- RLS Policies: Authenticated users can write
 -- (For admin access via service role key, RLS is bypassed)
 -- ============================================
+CREATE POLICY "Authenticated insert for divisions" ON divisions
+    FOR INSERT WITH CHECK (auth.role() = 'authenticated');
+
 CREATE POLICY "Authenticated insert for teams" ON teams
     FOR INSERT WITH CHECK (auth.role() = 'authenticated');
 
@@ -127,8 +319,424 @@ CREATE POLICY "Authenticated insert for score_logs" ON score_logs
 CREATE POLICY "Authenticated delete for score_logs" ON score_logs
     FOR DELETE USING (auth.role() = 'authenticated');
 
+-- ============================================
+-- Bulk roster edits
+-- Applies every insert, update and delete from the Players grid in one
+-- transaction. inserts/updates are JSON arrays of
+-- {id?, name, team_name, jersey_number}; deletes is a list of player ids.
+-- ============================================
+CREATE OR REPLACE FUNCTION apply_roster_changes(
+    inserts JSONB DEFAULT '[]',
+    updates JSONB DEFAULT '[]',
+    deletes BIGINT[] DEFAULT '{}'
+)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- Check jersey numbers once, against the final roster
+    SET CONSTRAINTS players_team_name_jersey_number_key DEFERRED;
+
+    DELETE FROM players WHERE id = ANY(deletes);
+
+    UPDATE players p
+    SET name = u.name, team_name = u.team_name, jersey_number = u.jersey_number
+    FROM jsonb_to_recordset(updates) AS u(id BIGINT, name TEXT, team_name TEXT, jersey_number INTEGER)
+    WHERE p.id = u.id;
+
+    INSERT INTO players (name, team_name, jersey_number)
+    SELECT i.name, i.team_name, i.jersey_number
+    FROM jsonb_to_recordset(inserts) AS i(name TEXT, team_name TEXT, jersey_number INTEGER);
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION apply_roster_changes(JSONB, JSONB, BIGINT[]) FROM PUBLIC, anon;
+
+-- ============================================
+-- Batched ledger corrections
+-- Deletes ledger entries, or moves them to another player, in one
+-- transaction. The ledger is append-only apart from deletes (the replicas
+-- and the broadcaster only follow inserts and tombstones), so a moved
+-- entry is deleted and re-inserted for the new player with its original
+-- created_at, which keeps its place in the play-by-play. When a
+-- correction changes the result of a final game, both teams' records are
+-- updated in the same transaction.
+-- ============================================
+
+-- Home team result (1 win, 0 tie, -1 loss) of those of the given games
+-- that are final, with scores summed from score_logs
+CREATE OR REPLACE FUNCTION final_game_outcomes(game_ids BIGINT[])
+RETURNS TABLE (game_id BIGINT, home_team_name TEXT, away_team_name TEXT, outcome INTEGER)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        g.id,
+        g.home_team_name,
+        g.away_team_name,
+        sign(
+            COALESCE(SUM(s.points) FILTER (WHERE s.team_name = g.home_team_name), 0)
+            - COALESCE(SUM(s.points) FILTER (WHERE s.team_name = g.away_team_name), 0)
+        )::INTEGER
+    FROM games g
+    LEFT JOIN score_logs s ON s.game_id = g.id
+    WHERE g.id = ANY(game_ids) AND g.status = 'final'
+    GROUP BY g.id;
+$$;
+
+-- Locks the games of the given entries, then their teams in name order
+-- (the order end_game() takes them in), and returns the games' outcomes
+-- before the correction as a JSON array of final_game_outcomes() rows
+CREATE OR REPLACE FUNCTION begin_ledger_correction(score_log_ids BIGINT[])
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    corrected_games BIGINT[];
+BEGIN
+    corrected_games := ARRAY(
+        SELECT DISTINCT s.game_id FROM score_logs s WHERE s.id = ANY(score_log_ids)
+    );
+
+    PERFORM 1 FROM games g WHERE g.id = ANY(corrected_games) ORDER BY g.id FOR UPDATE;
+    PERFORM 1 FROM teams t
+    WHERE t.name IN (
+        SELECT g.home_team_name FROM games g WHERE g.id = ANY(corrected_games)
+        UNION
+        SELECT g.away_team_name FROM games g WHERE g.id = ANY(corrected_games)
+    )
+    ORDER BY t.name
+    FOR UPDATE;
+
+    RETURN (SELECT COALESCE(jsonb_agg(o), '[]') FROM final_game_outcomes(corrected_games) o);
+END;
+$$;
+
+-- Moves a win, loss or tie from each game's outcome before the correction
+-- (from begin_ledger_correction()) to its outcome now
+CREATE OR REPLACE FUNCTION finish_ledger_correction(outcomes_before JSONB)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    WITH changed AS (
+        SELECT b.home_team_name, b.away_team_name, b.outcome AS was, o.outcome AS is_now
+        FROM jsonb_to_recordset(outcomes_before)
+            AS b(game_id BIGINT, home_team_name TEXT, away_team_name TEXT, outcome INTEGER)
+        JOIN final_game_outcomes(ARRAY(
+            SELECT (e->>'game_id')::BIGINT FROM jsonb_array_elements(outcomes_before) e
+        )) o ON o.game_id = b.game_id
+        WHERE o.outcome <> b.outcome
+    ),
+    changes AS (
+        SELECT
+            home_team_name AS team,
+            (is_now > 0)::INT - (was > 0)::INT AS wins,
+            (is_now < 0)::INT - (was < 0)::INT AS losses
+        FROM changed
+        UNION ALL
+        SELECT away_team_name, (is_now < 0)::INT - (was < 0)::INT, (is_now > 0)::INT - (was > 0)::INT
+        FROM changed
+    )
+    UPDATE teams t
+    SET wins = t.wins + c.wins, losses = t.losses + c.losses
+    FROM (SELECT team, SUM(wins) AS wins, SUM(losses) AS losses FROM changes GROUP BY team) c
+    WHERE t.name = c.team;
+$$;
+
+REVOKE EXECUTE ON FUNCTION begin_ledger_correction(BIGINT[]) FROM PUBLIC, anon;
+REVOKE EXECUTE ON FUNCTION finish_ledger_correction(JSONB) FROM PUBLIC, anon;
+
+CREATE OR REPLACE FUNCTION delete_score_logs(score_log_ids BIGINT[])
+RETURNS SETOF score_logs
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    outcomes_before JSONB;
+BEGIN
+    outcomes_before := begin_ledger_correction(score_log_ids);
+
+    RETURN QUERY DELETE FROM score_logs WHERE id = ANY(score_log_ids) RETURNING *;
+
+    PERFORM finish_ledger_correction(outcomes_before);
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION delete_score_logs(BIGINT[]) FROM PUBLIC, anon;
+
+CREATE OR REPLACE FUNCTION reassign_score_logs(
+    score_log_ids BIGINT[],
+    new_player_name TEXT,
+    new_team_name TEXT
+)
+RETURNS SETOF score_logs
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    outcomes_before JSONB;
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM score_logs s JOIN games g ON g.id = s.game_id
+        WHERE s.id = ANY(score_log_ids)
+          AND new_team_name NOT IN (g.home_team_name, g.away_team_name)
+    ) THEN
+        RAISE EXCEPTION '% did not play in every selected game', new_team_name;
+    END IF;
+
+    outcomes_before := begin_ledger_correction(score_log_ids);
+
+    RETURN QUERY
+    WITH moved AS (
+        DELETE FROM score_logs WHERE id = ANY(score_log_ids)
+        RETURNING game_id, points, created_at, id
+    )
+    INSERT INTO score_logs (game_id, player_name, team_name, points, created_at)
+    SELECT game_id, new_player_name, new_team_name, points, created_at
+    FROM moved
+    ORDER BY created_at, id
+    RETURNING *;
+
+    PERFORM finish_ledger_correction(outcomes_before);
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION reassign_score_logs(BIGINT[], TEXT, TEXT) FROM PUBLIC, anon;
+
+-- ============================================
+-- Power ratings
+-- Ratings are margin-adjusted Elo, applied game by game in schedule
+-- order, (start_time, id). end_game() applies one game;
+-- save_team_ratings() stores a full replay of a division from
+-- admin/league/ratings.py, which holds the same formula (keep the two in
+-- step). Both lock the teams rows in name order, so End Games and
+-- recomputes queue up instead of overwriting each other.
+-- ============================================
+
+-- Writes a recomputed division: ratings is a JSON array of
+-- {team_name, rating}, history one of {game_id, team_name, rating_before,
+-- rating_after} covering every final game. Fails if games were finalized
+-- or reopened since the replay read them.
+DROP FUNCTION IF EXISTS save_team_ratings(TEXT, JSONB, JSONB, BOOLEAN);
+
+CREATE OR REPLACE FUNCTION save_team_ratings(
+    division TEXT,
+    ratings JSONB,
+    history JSONB
+)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM 1 FROM teams t WHERE t.division_name = division ORDER BY t.name FOR UPDATE;
+
+    IF EXISTS (
+        SELECT 1 FROM games g
+        WHERE g.division_name = division AND g.status = 'final'
+          AND g.id NOT IN (SELECT (h->>'game_id')::BIGINT FROM jsonb_array_elements(history) h)
+    ) OR EXISTS (
+        SELECT 1 FROM jsonb_array_elements(history) h
+        LEFT JOIN games g ON g.id = (h->>'game_id')::BIGINT
+        WHERE g.status IS DISTINCT FROM 'final'
+    ) THEN
+        RAISE EXCEPTION 'Games in % were ended or reopened during the recompute; run it again', division;
+    END IF;
+
+    DELETE FROM team_rating_history WHERE division_name = division;
+
+    UPDATE teams t
+    SET rating = r.rating
+    FROM jsonb_to_recordset(ratings) AS r(team_name TEXT, rating DOUBLE PRECISION)
+    WHERE t.name = r.team_name;
+
+    INSERT INTO team_rating_history (game_id, team_name, division_name, rating_before, rating_after)
+    SELECT h.game_id, h.team_name, division, h.rating_before, h.rating_after
+    FROM jsonb_to_recordset(history)
+        AS h(game_id BIGINT, team_name TEXT, rating_before DOUBLE PRECISION, rating_after DOUBLE PRECISION);
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION save_team_ratings(TEXT, JSONB, JSONB) FROM PUBLIC, anon;
+
+-- End Game: marks a game final and updates both teams' records and
+-- ratings in one transaction, with scores summed from score_logs. Ending
+-- a game that is already final changes nothing. When either team already
+-- has a later final game, or this game was rated before (it was reopened),
+-- rating it now would not match a replay in schedule order, so ratings
+-- are left alone and needs_recompute tells the caller to replay the
+-- division.
+CREATE OR REPLACE FUNCTION end_game(target_game_id BIGINT)
+RETURNS TABLE (
+    home_pts INTEGER,
+    away_pts INTEGER,
+    already_final BOOLEAN,
+    needs_recompute BOOLEAN
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    g games%ROWTYPE;
+    home_rating DOUBLE PRECISION;
+    away_rating DOUBLE PRECISION;
+    home_lead DOUBLE PRECISION;
+    margin INTEGER;
+    shift DOUBLE PRECISION;
+BEGIN
+    -- Serializes End Game taps on the same game
+    SELECT * INTO g FROM games WHERE id = target_game_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Game % does not exist', target_game_id;
+    END IF;
+
+    SELECT
+        COALESCE(SUM(s.points) FILTER (WHERE s.team_name = g.home_team_name), 0),
+        COALESCE(SUM(s.points) FILTER (WHERE s.team_name = g.away_team_name), 0)
+    INTO home_pts, away_pts
+    FROM score_logs s
+    WHERE s.game_id = target_game_id;
+
+    already_final := g.status = 'final';
+    needs_recompute := FALSE;
+    IF already_final THEN
+        RETURN NEXT;
+        RETURN;
+    END IF;
+
+    PERFORM 1 FROM teams t
+    WHERE t.name IN (g.home_team_name, g.away_team_name)
+    ORDER BY t.name
+    FOR UPDATE;
+
+    UPDATE games SET status = 'final' WHERE id = target_game_id;
+
+    -- Tie: no record changes
+    IF home_pts > away_pts THEN
+        UPDATE teams SET wins = wins + 1 WHERE name = g.home_team_name;
+        UPDATE teams SET losses = losses + 1 WHERE name = g.away_team_name;
+    ELSIF away_pts > home_pts THEN
+        UPDATE teams SET wins = wins + 1 WHERE name = g.away_team_name;
+        UPDATE teams SET losses = losses + 1 WHERE name = g.home_team_name;
+    END IF;
+
+    needs_recompute := EXISTS (
+        SELECT 1 FROM team_rating_history h WHERE h.game_id = target_game_id
+    ) OR EXISTS (
+        SELECT 1 FROM games later
+        WHERE later.status = 'final'
+          AND (later.start_time, later.id) > (g.start_time, g.id)
+          AND (later.home_team_name IN (g.home_team_name, g.away_team_name)
+               OR later.away_team_name IN (g.home_team_name, g.away_team_name))
+    );
+    IF needs_recompute THEN
+        RETURN NEXT;
+        RETURN;
+    END IF;
+
+    SELECT COALESCE(MAX(t.rating), 1500) INTO home_rating FROM teams t WHERE t.name = g.home_team_name;
+    SELECT COALESCE(MAX(t.rating), 1500) INTO away_rating FROM teams t WHERE t.name = g.away_team_name;
+
+    -- ratings._rating_shift(), with HOME_ADVANTAGE = 0 and K_FACTOR = 20
+    home_lead := home_rating - away_rating;
+    margin := home_pts - away_pts;
+    shift := 20.0
+        * power(abs(margin) + 3.0, 0.8) / (7.5 + 0.006 * sign(margin) * home_lead)
+        * (CASE WHEN margin > 0 THEN 1.0 WHEN margin < 0 THEN 0.0 ELSE 0.5 END
+           - 1.0 / (1.0 + power(10.0, -home_lead / 400.0)));
+
+    UPDATE teams SET rating = home_rating + shift WHERE name = g.home_team_name;
+    UPDATE teams SET rating = away_rating - shift WHERE name = g.away_team_name;
+
+    INSERT INTO team_rating_history (game_id, team_name, division_name, rating_before, rating_after)
+    VALUES
+        (target_game_id, g.home_team_name, g.division_name, home_rating, home_rating + shift),
+        (target_game_id, g.away_team_name, g.division_name, away_rating, away_rating - shift);
+
+    RETURN NEXT;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION end_game(BIGINT) FROM PUBLIC, anon;
+
+-- ============================================
+-- Reconciliation: team records vs the ledger
+-- team_record_audit recomputes every team's W-L from final games and
+-- score_logs in one set-based query and lists the teams whose stored
+-- record disagrees. reconcile_team_records() returns that list and, with
+-- repair => true, corrects teams.wins/losses in the same transaction.
+-- Run nightly with: python -m league.reconcile --repair (from admin/)
+-- ============================================
+CREATE OR REPLACE VIEW team_record_audit
+WITH (security_invoker = on) AS
+WITH final_scores AS (
+    SELECT
+        g.id,
+        g.home_team_name,
+        g.away_team_name,
+        COALESCE(SUM(s.points) FILTER (WHERE s.team_name = g.home_team_name), 0) AS home_pts,
+        COALESCE(SUM(s.points) FILTER (WHERE s.team_name = g.away_team_name), 0) AS away_pts
+    FROM games g
+    LEFT JOIN score_logs s ON s.game_id = g.id
+    WHERE g.status = 'final'
+    GROUP BY g.id
+),
+results AS (
+    SELECT home_team_name AS team, (home_pts > away_pts)::INT AS win, (home_pts < away_pts)::INT AS loss
+    FROM final_scores
+    UNION ALL
+    SELECT away_team_name, (away_pts > home_pts)::INT, (away_pts < home_pts)::INT
+    FROM final_scores
+),
+expected AS (
+    SELECT
+        t.name AS team,
+        t.wins AS stored_wins,
+        t.losses AS stored_losses,
+        COALESCE(SUM(r.win), 0)::INT AS expected_wins,
+        COALESCE(SUM(r.loss), 0)::INT AS expected_losses
+    FROM teams t
+    LEFT JOIN results r ON r.team = t.name
+    GROUP BY t.id
+)
+SELECT * FROM expected
+WHERE stored_wins IS DISTINCT FROM expected_wins
+   OR stored_losses IS DISTINCT FROM expected_losses;
+
+CREATE OR REPLACE FUNCTION reconcile_team_records(repair BOOLEAN DEFAULT FALSE)
+RETURNS TABLE (
+    team TEXT,
+    stored_wins INTEGER,
+    stored_losses INTEGER,
+    expected_wins INTEGER,
+    expected_losses INTEGER
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF repair THEN
+        -- Hold off End Game record updates until the repair commits
+        LOCK TABLE teams IN SHARE ROW EXCLUSIVE MODE;
+    END IF;
+
+    DROP TABLE IF EXISTS reconcile_discrepancies;
+    CREATE TEMP TABLE reconcile_discrepancies ON COMMIT DROP AS
+    SELECT * FROM team_record_audit;
+
+    IF repair THEN
+        UPDATE teams t
+        SET wins = d.expected_wins, losses = d.expected_losses
+        FROM reconcile_discrepancies d
+        WHERE t.name = d.team;
+    END IF;
+
+    RETURN QUERY SELECT * FROM reconcile_discrepancies d ORDER BY d.team;
+END;
+$$;
+
+-- Only the admin (service role) may run or repair the reconciliation
+REVOKE EXECUTE ON FUNCTION reconcile_team_records(BOOLEAN) FROM PUBLIC, anon, authenticated;
+
 -- ============================================
 -- Enable Realtime for live scoring
 -- ============================================
 ALTER PUBLICATION supabase_realtime ADD TABLE score_logs;
 ALTER PUBLICATION supabase_realtime ADD TABLE games;
+-- Undo deletes reach the live-score broadcaster as tombstone inserts
+ALTER PUBLICATION supabase_realtime ADD TABLE score_log_tombstones;
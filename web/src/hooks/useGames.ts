@@ -1,7 +1,15 @@
 import { useState, useEffect } from 'react'
 import { supabase } from '../lib/supabase'
+import { BROADCASTER_URL, watchGame } from '../lib/broadcaster'
+import type { ScoreDelta } from '../lib/broadcaster'
 import type { Game, GameWithScores, ScoreLog } from '../types'
 
+function withTeamScore(game: GameWithScores, team: string, total: number): GameWithScores {
+  if (team === game.home_team_name) return { ...game, home_score: total }
+  if (team === game.away_team_name) return { ...game, away_score: total }
+  return game
+}
+
 export function useGames(teamName?: string | null, status?: Game['status']) {
   const [games, setGames] = useState<Game[]>([])
   const [loading, setLoading] = useState(true)
@@ -109,6 +117,35 @@ export function useGameWithScores(gameId: number | null) {
 
     fetchGame()
 
+    // With a broadcaster, apply its deltas instead of refetching per basket
+    if (BROADCASTER_URL) {
+      let connected = false
+      return watchGame(gameId, {
+        onSnapshot: (snapshot) => {
+          // Later snapshots follow a reconnect that may have missed baskets
+          if (connected) fetchGame()
+          connected = true
+          setGame(current => current && {
+            ...current,
+            home_score: snapshot.scores[current.home_team_name] ?? current.home_score,
+            away_score: snapshot.scores[current.away_team_name] ?? current.away_score
+          })
+        },
+        onScore: (delta: ScoreDelta) => {
+          setGame(current => current && withTeamScore(current, delta.team, delta.total))
+          setScoreLogs(logs => logs.some(log => log.id === delta.event.id) ? logs : [
+            { ...delta.event, game_id: delta.game_id, team_name: delta.team } as ScoreLog,
+            ...logs
+          ])
+        },
+        onUndo: (delta: ScoreDelta) => {
+          setGame(current => current && withTeamScore(current, delta.team, delta.total))
+          setScoreLogs(logs => logs.filter(log => log.id !== delta.event.id))
+        },
+        onStatus: () => fetchGame()
+      })
+    }
+
     // Subscribe to score_logs changes for this game
     const channel = supabase
       .channel(`game-${gameId}`)
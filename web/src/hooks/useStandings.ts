@@ -1,5 +1,6 @@
 import { useState, useEffect } from 'react'
 import { supabase } from '../lib/supabase'
+import { buildStandings } from '../lib/standings'
 import type { TeamStanding, Team, ScoreLog, Game } from '../types'
 
 export function useStandings() {
@@ -33,58 +34,12 @@ export function useStandings() {
 
       if (gamesError) throw gamesError
 
-      // Calculate points for and against for each team
-      const teamStats = new Map<string, { pf: number; pa: number }>()
-
-      for (const team of (teams || []) as Team[]) {
-        teamStats.set(team.name, { pf: 0, pa: 0 })
-      }
-
-      // Process each final game
-      for (const game of (games || []) as Game[]) {
-        const homeScores = (scoreLogs || [])
-          .filter((log: ScoreLog) => log.game_id === game.id && log.team_name === game.home_team_name)
-          .reduce((sum: number, log: ScoreLog) => sum + log.points, 0)
-
-        const awayScores = (scoreLogs || [])
-          .filter((log: ScoreLog) => log.game_id === game.id && log.team_name === game.away_team_name)
-          .reduce((sum: number, log: ScoreLog) => sum + log.points, 0)
-
-        const homeStats = teamStats.get(game.home_team_name)
-        const awayStats = teamStats.get(game.away_team_name)
-
-        if (homeStats) {
-          homeStats.pf += homeScores
-          homeStats.pa += awayScores
-        }
-
-        if (awayStats) {
-          awayStats.pf += awayScores
-          awayStats.pa += homeScores
-        }
-      }
-
-      // Build standings array
-      const standingsData: TeamStanding[] = ((teams || []) as Team[])
-        .map(team => {
-          const stats = teamStats.get(team.name) || { pf: 0, pa: 0 }
-          return {
-            ...team,
-            rank: 0,
-            points_for: stats.pf,
-            points_against: stats.pa,
-            point_diff: stats.pf - stats.pa
-          }
-        })
-        .sort((a, b) => {
-          // Sort by wins first, then by point differential
-          if (b.wins !== a.wins) return b.wins - a.wins
-          return b.point_diff - a.point_diff
-        })
-        .map((team, index) => ({
-          ...team,
-          rank: index + 1
-        }))
+      // Rank with head-to-head tiebreakers (see lib/standings.ts)
+      const standingsData = buildStandings(
+        (teams || []) as Team[],
+        (games || []) as Game[],
+        (scoreLogs || []) as ScoreLog[]
+      )
 
       setStandings(standingsData)
       setError(null)
@@ -0,0 +1,51 @@
+// Live score deltas from the broadcaster service (broadcaster/ in the repo
+// root). One server-side Realtime subscription fans out to every viewer, so
+// a basket costs each viewer one small message instead of a refetch.
+
+export const BROADCASTER_URL = import.meta.env.VITE_BROADCASTER_URL?.replace(/\/$/, '')
+
+export interface GameSnapshot {
+  game_id: number
+  status: string
+  home: string | null
+  away: string | null
+  scores: Record<string, number>
+}
+
+export interface ScoreDelta {
+  game_id: number
+  team: string
+  total: number
+  event: {
+    id: number
+    points: number
+    player_name?: string   // not sent for undo
+    created_at?: string
+  }
+}
+
+export interface StatusChange {
+  game_id: number
+  status: string
+}
+
+interface GameHandlers {
+  onSnapshot: (snapshot: GameSnapshot) => void
+  onScore: (delta: ScoreDelta) => void
+  onUndo: (delta: ScoreDelta) => void
+  onStatus: (change: StatusChange) => void
+}
+
+// Returns a function that closes the stream. EventSource reconnects by
+// itself, and every (re)connect starts with a snapshot.
+export function watchGame(gameId: number, handlers: GameHandlers): () => void {
+  const source = new EventSource(`${BROADCASTER_URL}/games/${gameId}/events`)
+  const listen = <T,>(event: string, handler: (message: T) => void) => {
+    source.addEventListener(event, (e) => handler(JSON.parse((e as MessageEvent).data)))
+  }
+  listen('snapshot', handlers.onSnapshot)
+  listen('score', handlers.onScore)
+  listen('undo', handlers.onUndo)
+  listen('status', handlers.onStatus)
+  return () => source.close()
+}
@@ -0,0 +1,105 @@
+// Standings ordering, kept in step with admin/league/standings.py:
+// wins, then head-to-head record and head-to-head point differential among
+// the teams tied on wins, then overall point differential, points for, name.
+// The first tiebreaker that tells any of the tied teams apart splits them
+// into groups, and each group still tied starts again from head-to-head,
+// counted among that group only.
+
+import type { Game, ScoreLog, Team, TeamStanding } from '../types'
+
+interface MatchupMatrix {
+  index: Map<string, number>
+  wins: number[][]      // wins[i][j]: times team i beat team j
+  margin: number[][]    // margin[i][j]: points team i outscored team j by
+  pointsFor: number[]
+  pointsAgainst: number[]
+}
+
+function buildMatrix(teams: Team[], games: Game[], scoreLogs: ScoreLog[]): MatchupMatrix {
+  const index = new Map(teams.map((team, i) => [team.name, i]))
+  const size = teams.length
+  const matrix: MatchupMatrix = {
+    index,
+    wins: Array.from({ length: size }, () => new Array(size).fill(0)),
+    margin: Array.from({ length: size }, () => new Array(size).fill(0)),
+    pointsFor: new Array(size).fill(0),
+    pointsAgainst: new Array(size).fill(0)
+  }
+
+  // One pass over the ledger for every game's totals
+  const totals = new Map<string, number>()
+  for (const log of scoreLogs) {
+    const key = `${log.game_id}|${log.team_name}`
+    totals.set(key, (totals.get(key) || 0) + log.points)
+  }
+
+  for (const game of games) {
+    const h = index.get(game.home_team_name)
+    const a = index.get(game.away_team_name)
+    const homePts = totals.get(`${game.id}|${game.home_team_name}`) || 0
+    const awayPts = totals.get(`${game.id}|${game.away_team_name}`) || 0
+
+    if (h !== undefined) {
+      matrix.pointsFor[h] += homePts
+      matrix.pointsAgainst[h] += awayPts
+    }
+    if (a !== undefined) {
+      matrix.pointsFor[a] += awayPts
+      matrix.pointsAgainst[a] += homePts
+    }
+    if (h === undefined || a === undefined) continue
+
+    matrix.margin[h][a] += homePts - awayPts
+    matrix.margin[a][h] += awayPts - homePts
+    if (homePts > awayPts) matrix.wins[h][a] += 1
+    else if (awayPts > homePts) matrix.wins[a][h] += 1
+  }
+
+  return matrix
+}
+
+// Orders teams (matrix indexes) that are level on every tiebreaker before these
+function breakTie(tied: number[], teams: Team[], matrix: MatchupMatrix): number[] {
+  if (tied.length < 2) return tied
+
+  // A team's own diagonal entries are zero, so it can stay in the sums
+  const tiebreakers: ((i: number) => number)[] = [
+    i => tied.reduce((total, j) => total + matrix.wins[i][j] - matrix.wins[j][i], 0),
+    i => tied.reduce((total, j) => total + matrix.margin[i][j], 0),
+    i => matrix.pointsFor[i] - matrix.pointsAgainst[i],
+    i => matrix.pointsFor[i]
+  ]
+
+  for (const tiebreaker of tiebreakers) {
+    const values = new Map(tied.map(i => [i, tiebreaker(i)]))
+    const distinct = [...new Set(values.values())].sort((a, b) => b - a)
+    if (distinct.length > 1) {
+      return distinct.flatMap(value =>
+        breakTie(tied.filter(i => values.get(i) === value), teams, matrix)
+      )
+    }
+  }
+  return [...tied].sort((a, b) =>
+    teams[a].name < teams[b].name ? -1 : teams[a].name > teams[b].name ? 1 : 0
+  )
+}
+
+export function buildStandings(teams: Team[], finalGames: Game[], scoreLogs: ScoreLog[]): TeamStanding[] {
+  const matrix = buildMatrix(teams, finalGames, scoreLogs)
+
+  // Teams level on wins, as matrix indexes
+  const tied = new Map<number, number[]>()
+  teams.forEach((team, i) => {
+    tied.set(team.wins, [...(tied.get(team.wins) || []), i])
+  })
+
+  const ranked = [...tied.keys()]
+    .sort((a, b) => b - a)
+    .flatMap(wins => breakTie(tied.get(wins) || [], teams, matrix))
+
+  return ranked.map((i, index) => {
+    const pf = matrix.pointsFor[i]
+    const pa = matrix.pointsAgainst[i]
+    return { ...teams[i], rank: index + 1, points_for: pf, points_against: pa, point_diff: pf - pa }
+  })
+}
@@ -55,20 +55,21 @@ export function Standings() {
         <div className="p-4">
           {/* Table Header */}
           <div className="card overflow-hidden">
-            <div className="grid grid-cols-[auto_1fr_repeat(4,minmax(0,1fr))] gap-2 px-4 py-2 bg-gray-50 dark:bg-gray-800 text-xs font-medium text-gray-500 dark:text-gray-400 border-b border-gray-200 dark:border-gray-700">
+            <div className="grid grid-cols-[auto_1fr_repeat(5,minmax(0,1fr))] gap-2 px-4 py-2 bg-gray-50 dark:bg-gray-800 text-xs font-medium text-gray-500 dark:text-gray-400 border-b border-gray-200 dark:border-gray-700">
               <span className="w-8">#</span>
               <span>Team</span>
               <span className="text-center">W-L</span>
               <span className="text-center">PF</span>
               <span className="text-center">PA</span>
               <span className="text-center">+/-</span>
+              <span className="text-center">Rtg</span>
             </div>
 
             {standings.map((team, index) => (
               <Link
                 key={team.id}
                 to={`/team/${team.name}`}
-                className={`grid grid-cols-[auto_1fr_repeat(4,minmax(0,1fr))] gap-2 px-4 py-3 items-center hover:bg-gray-50 dark:hover:bg-gray-700/50 ${
+                className={`grid grid-cols-[auto_1fr_repeat(5,minmax(0,1fr))] gap-2 px-4 py-3 items-center hover:bg-gray-50 dark:hover:bg-gray-700/50 ${
                   team.name === selectedTeamName ? 'bg-tamkeen-primary/5' : ''
                 } ${index < standings.length - 1 ? 'border-b border-gray-100 dark:border-gray-700' : ''}`}
               >
@@ -85,12 +86,13 @@ export function Standings() {
                 }`}>
                   {team.point_diff > 0 ? '+' : ''}{team.point_diff}
                 </span>
+                <span className="text-center text-sm text-gray-600 dark:text-gray-400">{Math.round(team.rating)}</span>
               </Link>
             ))}
           </div>
 
           <div className="mt-4 text-xs text-gray-500 dark:text-gray-400 text-center">
-            PF = Points For • PA = Points Against • +/- = Point Differential
+            PF = Points For • PA = Points Against • +/- = Point Differential • Rtg = Power Rating
           </div>
         </div>
       )}
@@ -95,6 +95,7 @@ export function TeamDetail() {
                 {teamStanding && (
                   <span>Rank: <span className="font-semibold text-white">#{teamStanding.rank}</span></span>
                 )}
+                <span>Rating: <span className="font-semibold text-white">{Math.round(team.rating)}</span></span>
               </div>
             )}
           </div>
@@ -5,6 +5,8 @@ export interface Team {
   name: string
   wins: number
   losses: number
+  division_name: string
+  rating: number  // power rating, updated when a game is finalized
   created_at: string
 }
 
@@ -23,6 +25,7 @@ export interface Game {
   start_time: string
   location: string
   status: 'scheduled' | 'live' | 'final'
+  division_name: string
   created_at: string
 }
 
@@ -32,6 +35,7 @@ export interface ScoreLog {
   player_name: string
   team_name: string
   points: 1 | 2 | 3
+  division_name: string
   created_at: string
 }
 